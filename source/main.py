@@ -1,14 +1,9 @@
 import argparse
-import concurrent.futures
 import os
 import sys
-from src.config import URLS, DEFAULT_MAX_WORKERS
-from src.logger import updated_files, _UPDATED_FILES_LOCK, LOGS_BY_FILE
-from src.file_manager import download_and_save, create_filtered_configs
-from src.release_fetcher import fetch_latest_release_links, fetch_vc_runtime_link
-from src.readme_updater import update_readme_download_links, update_readme_table
-from src.github_api import get_repo_stats
-from src.git_ops import git_commit_and_push
+from src.config import configure
+from src.context import RunContext
+from src.pipeline import run_pipeline
 
 # Настройка кодировки вывода для избежания ошибок UnicodeEncodeError на Windows
 try:
@@ -19,57 +14,53 @@ except AttributeError:
 # -------------------- MAIN --------------------
 
 def main(dry_run: bool = False):
-    max_workers_download = min(DEFAULT_MAX_WORKERS, max(1, len(URLS)))
-
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers_download) as pool:
-        futures = [pool.submit(download_and_save, i) for i in range(len(URLS))]
-        for future in concurrent.futures.as_completed(futures):
-            result = future.result()
-            if result:
-                _, file_index = result
-                with _UPDATED_FILES_LOCK:
-                    updated_files.add(file_index)
-
-    local_path_26 = create_filtered_configs()
-    # Определяем, изменился ли 26-й файл
-    if os.path.exists(local_path_26):
-        with _UPDATED_FILES_LOCK:
-            updated_files.add(26)
-
-    # Независимые сетевые запросы выполняем параллельно, чтобы не ждать
-    # их последовательно (release links, VC runtime, статистика репозитория).
-    with concurrent.futures.ThreadPoolExecutor(max_workers=3) as net_pool:
-        f_releases = net_pool.submit(fetch_latest_release_links)
-        f_vc = net_pool.submit(fetch_vc_runtime_link)
-        f_stats = net_pool.submit(get_repo_stats)
-        release_links = f_releases.result()
-        vc_runtime_link = f_vc.result()
-        repo_stats = f_stats.result()
-
-    # Обновляем ссылки на скачивание v2rayNG, Throne и Visual C++ Runtimes
-    update_readme_download_links(release_links, vc_runtime_link)
-
-    update_readme_table(repo_stats=repo_stats)
-    git_commit_and_push(dry_run=dry_run)
-
-    # Вывод логов
-    ordered_keys = sorted(k for k in LOGS_BY_FILE if k != 0)
-    output_lines: list[str] = []
-    for k in ordered_keys:
-        output_lines.append(f"----- {k}.txt -----")
-        output_lines.extend(LOGS_BY_FILE[k])
-    if LOGS_BY_FILE.get(0):
-        output_lines.append("----- Общие сообщения -----")
-        output_lines.extend(LOGS_BY_FILE[0])
-    print("\n".join(output_lines))
+    ctx = RunContext()
+    try:
+        run_pipeline(ctx, dry_run=dry_run)
+    finally:
+        # Логи выводятся и при упавшей стадии: TaskGraph пробрасывает ошибку после завершения графа
+        print(ctx.format_logs())
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Скачивание репозитория и коммит в GitHub")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        choices=("run", "serve"),
+        default="run",
+        help="run — один прогон (по умолчанию), serve — сервис с раздачей подписок по HTTP",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
         help="Сохранять файлы локально и делать коммит, но не пушить",
     )
+    parser.add_argument("--output-dir", help="Папка для .txt файлов (по умолчанию <repo>/githubmirror)")
+    parser.add_argument("--repo-name", help="Репозиторий GitHub в формате <owner>/<repo>")
+    parser.add_argument("--max-workers", type=int, help="Число потоков для скачивания")
+    parser.add_argument(
+        "--output-order",
+        choices=("stable", "fingerprint", "upstream"),
+        help="Порядок строк в файлах: stable (по умолчанию), fingerprint или upstream",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="serve: адрес HTTP-сервера")
+    parser.add_argument("--port", type=int, default=8080, help="serve: порт HTTP-сервера")
+    parser.add_argument("--interval", type=int, default=540, help="serve: период обновления, секунды")
     args = parser.parse_args()
-    main(dry_run=args.dry_run)
+    configure(
+        githubmirror_dir=args.output_dir,
+        repo_name=args.repo_name,
+        max_workers=args.max_workers,
+        output_order=args.output_order,
+    )
+    if args.command == "serve":
+        from src.server import serve
+
+        # Сервис раздаёт готовые base64/gzip/zstd-варианты, поэтому по умолчанию собирает все
+        if "ARTIFACT_VARIANTS" not in os.environ:
+            configure(artifact_variants="all")
+
+        serve(lambda: main(dry_run=args.dry_run), host=args.host, port=args.port, interval=args.interval)
+    else:
+        main(dry_run=args.dry_run)
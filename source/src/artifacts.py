@@ -0,0 +1,170 @@
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+from src.config import get_settings
+from src.logger import log
+
+# -------------------- ВАРИАНТЫ ВЫХОДНЫХ ФАЙЛОВ --------------------
+# Рядом с каждым N.txt собираются N.txt.b64 (подписка в base64, MIME-строки по
+# 76 символов), N.txt.gz и N.txt.zst, чтобы клиенты не перекодировали
+# многомегабайтные файлы сами. В git варианты не коммитятся (.gitignore): в base64
+# меняется всё после первой вставленной или удалённой строки (сдвигается
+# выравнивание по 57 байт), а сжатые файлы меняются целиком, так что каждый
+# коммит добавлял бы в историю почти полный набор.
+# Раздаёт их режим serve (src.server), в нём же они включены по умолчанию.
+# Варианты пересобираются только при смене дайджеста исходного файла; индекс
+# дайджестов хранится в cache_dir, а пока size/mtime файла не изменились, файл
+# даже не перечитывается. Сжатие детерминировано (без mtime в заголовке gzip),
+# поэтому пересборка с пустым кэшем даёт те же байты.
+
+ARTIFACT_VARIANTS = ("b64", "gz", "zst")
+
+# Кратно 57 байтам (одна строка base64 в 76 символов): куски кодируются целыми
+# строками и склеиваются без паддинга в середине
+_CHUNK_SIZE = 57 * 16 * 1024
+
+
+def _iter_chunks(f):
+    return iter(lambda: f.read(_CHUNK_SIZE), b"")
+
+
+def _file_digest(path: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in _iter_chunks(f):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _write_b64(src, out):
+    # encodebytes переносит строки через 76 символов (MIME), как ожидают декодеры подписок
+    for chunk in _iter_chunks(src):
+        out.write(base64.encodebytes(chunk))
+
+
+def _write_gzip(src, out):
+    with gzip.GzipFile(filename="", mode="wb", fileobj=out, compresslevel=9, mtime=0) as gz:
+        for chunk in _iter_chunks(src):
+            gz.write(chunk)
+
+
+def _write_zstd(src, out):
+    import zstandard
+
+    # Уровень 12: на файлах в несколько МБ почти как 19, но на порядок быстрее
+    with zstandard.ZstdCompressor(level=12).stream_writer(out, closefd=False) as writer:
+        for chunk in _iter_chunks(src):
+            writer.write(chunk)
+
+
+# Меняется вместе с форматом вариантов, чтобы индекс со старым форматом не считался актуальным
+_FORMAT_VERSION = 2
+
+_WRITERS = {"b64": _write_b64, "gz": _write_gzip, "zst": _write_zstd}
+
+
+def _zstd_available() -> bool:
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ArtifactIndex:
+    """Дайджесты исходных файлов, для которых варианты уже собраны."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._state: dict[str, dict] = {}
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._state = data
+        except Exception:
+            self._state = {}
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            return self._state.get(key)
+
+    def set(self, key: str, entry: dict):
+        with self._lock:
+            self._state[key] = entry
+            data = json.dumps(self._state, ensure_ascii=False, sort_keys=True)
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            except Exception:
+                pass
+
+
+_INDEXES: dict[str, ArtifactIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_artifact_index() -> ArtifactIndex:
+    """Индекс для cache_dir текущих настроек, загружаемый с диска при первом обращении."""
+    path = os.path.abspath(os.path.join(get_settings().cache_dir, "artifacts.json"))
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(path)
+        if index is None:
+            index = ArtifactIndex(path)
+            index.load()
+            _INDEXES[path] = index
+        return index
+
+
+def update_variants(path: str) -> list[str]:
+    """Пересобирает варианты path (base64, gzip, zstd), если исходный файл изменился
+    или какого-то варианта нет. Каждый вариант пишется атомарно (tmp + os.replace).
+    Возвращает список пересобранных вариантов."""
+    variants = [v for v in get_settings().artifact_variants if v != "zst" or _zstd_available()]
+    if not variants:
+        return []
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return []
+
+    key = os.path.abspath(path)
+    index = get_artifact_index()
+    entry = index.get(key)
+    if entry and entry.get("format") != _FORMAT_VERSION:
+        entry = None
+    missing = [v for v in variants if not os.path.exists(f"{path}.{v}")]
+    if entry and not missing and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+        return []
+
+    name = os.path.basename(path)
+    try:
+        digest = _file_digest(path)
+        stale = missing if entry and entry.get("digest") == digest else variants
+        for variant in stale:
+            target = f"{path}.{variant}"
+            tmp_path = target + ".tmp"
+            try:
+                with open(path, "rb") as src, open(tmp_path, "wb") as out:
+                    _WRITERS[variant](src, out)
+                os.replace(tmp_path, target)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+    except OSError as e:
+        log(f"⚠️ Ошибка при сборке вариантов {name}: {e}")
+        return []
+
+    index.set(key, {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "digest": digest, "format": _FORMAT_VERSION})
+    if stale:
+        log(f"🗜️ Варианты {name} обновлены: {', '.join(stale)}")
+    return stale
@@ -1,49 +1,197 @@
 import os
-import subprocess
-import json
+import threading
+import contextvars
+from dataclasses import dataclass
+from functools import cached_property
+from src.sources import Aggregate, Source, load_aggregates, load_sources
 
+# Только вычисление путей: при импорте модуля не выполняется никакого I/O.
 SOURCE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
-# -------------------- КОРЕНЬ РЕПОЗИТОРИЯ --------------------
-try:
-    GIT_ROOT = subprocess.check_output(
-        ["git", "rev-parse", "--show-toplevel"],
-        stderr=subprocess.DEVNULL,
-    ).decode().strip()
-except Exception:
-    GIT_ROOT = os.path.abspath(os.path.join(SOURCE_ROOT, ".."))
-
-GITHUBMIRROR_DIR = os.path.join(GIT_ROOT, "githubmirror")
-README_PATH = os.path.join(GIT_ROOT, "README.md")
-SNI_DOMAINS_PATH = os.path.join(SOURCE_ROOT, "config", "sni_domains.json")
-URLS_PATH = os.path.join(SOURCE_ROOT, "config", "urls.json")
-URLS_26_PATH = os.path.join(SOURCE_ROOT, "config", "26_urls.json")
 
 # -------------------- ЗАГРУЗКА КОНФИГУРАЦИИ --------------------
-def _load_json_list(path: str, default: list) -> list:
+def _as_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+
+def _output_order(value: str) -> str:
+    # Значения совпадают с src.ordering.OUTPUT_ORDERS; модуль не импортируется ради старта
+    value = value.strip().lower()
+    if value not in ("stable", "fingerprint", "upstream"):
+        raise ValueError(f"Неизвестный порядок вывода: {value} (stable, fingerprint, upstream)")
+    return value
+
+
+def _http_transport(value: str) -> str:
+    value = value.strip().lower()
+    if value not in ("auto", "httpx", "requests"):
+        raise ValueError(f"Неизвестный транспорт: {value} (auto, httpx, requests)")
+    return value
+
+
+def _known_artifact_variants() -> tuple[str, ...]:
+    # Импорт внутри функции: src.artifacts сам импортирует src.config
+    from src.artifacts import ARTIFACT_VARIANTS
+
+    return ARTIFACT_VARIANTS
+
+
+def _artifact_variants(value: str) -> tuple[str, ...]:
+    # Пустая строка или "none" — без вариантов, "all" — все известные
+    known = _known_artifact_variants()
+    variants = tuple(v.strip().lower() for v in value.split(",") if v.strip())
+    if variants == ("none",):
+        return ()
+    if variants == ("all",):
+        return known
+    unknown = [v for v in variants if v not in known]
+    if unknown:
+        raise ValueError(f"Неизвестные варианты файлов: {', '.join(unknown)} ({', '.join(known)})")
+    return variants
+
+
+def _detect_git_root() -> str:
+    import subprocess
+
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if isinstance(data, dict):
-                # Сортируем по ключам-числам для сохранения оригинального порядка
-                return [data[k] for k in sorted(data.keys(), key=lambda x: int(x))]
-            return data
+        return subprocess.check_output(
+            ["git", "rev-parse", "--show-toplevel"],
+            stderr=subprocess.DEVNULL,
+            cwd=SOURCE_ROOT,
+        ).decode().strip()
     except Exception:
-        return default
+        return os.path.abspath(os.path.join(SOURCE_ROOT, ".."))
+
+
+# -------------------- НАСТРОЙКИ --------------------
+@dataclass(eq=False)
+class Settings:
+    """Настройки запуска. Тяжёлые поля (списки URL) читаются при первом обращении."""
+
+    git_root: str
+    githubmirror_dir: str
+    readme_path: str
+    sni_domains_path: str
+    sources_path: str
+    outputs_path: str
+    cache_dir: str
+    github_token: str | None
+    repo_name: str
+    github_api_url: str
+    repo_stats_cache_ttl: int
+    extra_url_timeout: int
+    extra_url_max_attempts: int
+    max_workers: int
+    trace_memory: bool
+    adaptive_polling: bool
+    poll_base_interval: int
+    poll_max_staleness: int
+    output_order: str
+    http_transport: str
+    aggregate_shard_size: int
+    artifact_variants: tuple[str, ...]
+
+    @cached_property
+    def all_sources(self) -> list[Source]:
+        """Все источники из sources.json, включая выключенные (enabled: false)."""
+        return load_sources(self.sources_path)
+
+    @cached_property
+    def sources(self) -> list[Source]:
+        return [s for s in self.all_sources if s.enabled]
+
+    @cached_property
+    def aggregates(self) -> list[Aggregate]:
+        return load_aggregates(self.outputs_path, self.all_sources)
+
+    @cached_property
+    def urls(self) -> list[str]:
+        return [s.url for s in self.sources]
+
+    @cached_property
+    def local_paths(self) -> list[str]:
+        outputs = [s.output for s in self.sources] + [a.output for a in self.aggregates]
+        return [os.path.join(self.githubmirror_dir, name) for name in outputs]
+
+
+_SETTINGS: Settings | None = None
+_OVERRIDES: dict = {}
+_SETTINGS_LOCK = threading.Lock()
+# Настройки активного RunContext (см. src.context); перекрывают глобальные
+_ACTIVE_SETTINGS: contextvars.ContextVar[Settings | None] = contextvars.ContextVar("active_settings", default=None)
+
+
+def _build_settings(overrides: dict) -> Settings:
+    """Собирает настройки: CLI-переопределения > переменные окружения > значения по умолчанию."""
+    env = os.environ
 
-URLS = _load_json_list(URLS_PATH, [])
-EXTRA_URLS_FOR_26 = _load_json_list(URLS_26_PATH, [])
+    def _pick(name: str, env_name: str, default, cast=str, keep_empty: bool = False):
+        # keep_empty: пустая переменная окружения — значение, а не «не задано»
+        if overrides.get(name) is not None:
+            return cast(overrides[name])
+        if env.get(env_name) or (keep_empty and env_name in env):
+            return cast(env[env_name])
+        return default() if callable(default) else default
 
-# Создаём папку зеркала, если она не существует
-os.makedirs(GITHUBMIRROR_DIR, exist_ok=True)
+    git_root = _pick("git_root", "GIT_ROOT", _detect_git_root)
+    return Settings(
+        git_root=git_root,
+        githubmirror_dir=_pick("githubmirror_dir", "OUTPUT_DIR", os.path.join(git_root, "githubmirror")),
+        readme_path=_pick("readme_path", "README_PATH", os.path.join(git_root, "README.md")),
+        sni_domains_path=_pick(
+            "sni_domains_path", "SNI_DOMAINS_PATH", os.path.join(SOURCE_ROOT, "config", "sni_domains.json")
+        ),
+        sources_path=_pick("sources_path", "SOURCES_PATH", os.path.join(SOURCE_ROOT, "config", "sources.json")),
+        outputs_path=_pick("outputs_path", "OUTPUTS_PATH", os.path.join(SOURCE_ROOT, "config", "outputs.json")),
+        cache_dir=_pick("cache_dir", "CACHE_DIR", os.path.join(SOURCE_ROOT, ".cache")),
+        github_token=_pick("github_token", "MY_TOKEN", None),
+        repo_name=_pick("repo_name", "REPO_NAME", "AvenCores/goida-vpn-configs"),
+        github_api_url="https://api.github.com",
+        # GitHub пересчитывает traffic-статистику примерно раз в сутки,
+        # поэтому чаще раза в час ревалидировать кэш смысла нет.
+        repo_stats_cache_ttl=_pick("repo_stats_cache_ttl", "REPO_STATS_CACHE_TTL", 3600, int),
+        extra_url_timeout=_pick("extra_url_timeout", "EXTRA_URL_TIMEOUT", 6, int),
+        extra_url_max_attempts=_pick("extra_url_max_attempts", "EXTRA_URL_MAX_ATTEMPTS", 2, int),
+        max_workers=_pick("max_workers", "MAX_WORKERS", 16, int),
+        trace_memory=_pick("trace_memory", "TRACE_MEMORY", False, _as_bool),
+        adaptive_polling=_pick("adaptive_polling", "ADAPTIVE_POLLING", True, _as_bool),
+        # Базовый шаг равен периоду cron (9 минут); интервал удваивается, пока источник не меняется
+        poll_base_interval=_pick("poll_base_interval", "POLL_BASE_INTERVAL", 540, int),
+        poll_max_staleness=_pick("poll_max_staleness", "POLL_MAX_STALENESS", 3600, int),
+        output_order=_pick("output_order", "OUTPUT_ORDER", "stable", _output_order),
+        http_transport=_pick("http_transport", "HTTP_TRANSPORT", "auto", _http_transport),
+        # Сколько источников читает одна задача-шард при сборке агрегата. Маленький шард
+        # стартует сразу после своих скачиваний, а не ждёт самый медленный источник.
+        aggregate_shard_size=_pick("aggregate_shard_size", "AGGREGATE_SHARD_SIZE", 2, int),
+        # Готовые base64/gzip/zstd-версии выходных файлов (N.txt.b64, N.txt.gz, N.txt.zst).
+        # В git они не коммитятся, поэтому по умолчанию выключены; режим serve, который
+        # их раздаёт, включает все. ARTIFACT_VARIANTS="" или none — выключить, all — все.
+        artifact_variants=_pick("artifact_variants", "ARTIFACT_VARIANTS", (), _artifact_variants, keep_empty=True),
+    )
 
-GITHUB_TOKEN = os.environ.get("MY_TOKEN")
-REPO_NAME = "AvenCores/goida-vpn-configs"
 
-EXTRA_URL_TIMEOUT = int(os.environ.get("EXTRA_URL_TIMEOUT", "6"))
-EXTRA_URL_MAX_ATTEMPTS = int(os.environ.get("EXTRA_URL_MAX_ATTEMPTS", "2"))
+def get_settings() -> Settings:
+    """Возвращает настройки активного прогона или глобальные, собирая их при первом вызове."""
+    global _SETTINGS
+    active = _ACTIVE_SETTINGS.get()
+    if active is not None:
+        return active
+    settings = _SETTINGS
+    if settings is None:
+        with _SETTINGS_LOCK:
+            if _SETTINGS is None:
+                _SETTINGS = _build_settings(_OVERRIDES)
+            settings = _SETTINGS
+    return settings
 
-LOCAL_PATHS = [os.path.join(GITHUBMIRROR_DIR, f"{i+1}.txt") for i in range(len(URLS))]
-LOCAL_PATHS.append(os.path.join(GITHUBMIRROR_DIR, "26.txt"))
 
-DEFAULT_MAX_WORKERS = int(os.environ.get("MAX_WORKERS", "16"))
+def configure(**overrides) -> Settings:
+    """Задаёт переопределения (например, из аргументов CLI) и пересобирает настройки.
+    Значения None игнорируются."""
+    global _SETTINGS
+    with _SETTINGS_LOCK:
+        _OVERRIDES.update({k: v for k, v in overrides.items() if v is not None})
+        _SETTINGS = None
+    return get_settings()
@@ -0,0 +1,205 @@
+import contextvars
+import dataclasses
+import os
+import re
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from typing import Callable
+from src.config import Settings, get_settings, _ACTIVE_SETTINGS
+
+# -------------------- КОНТЕКСТ ПРОГОНА --------------------
+# Всё состояние одного прогона (настройки, время, логи, обновлённые файлы,
+# метрики) живёт в RunContext, а не в глобальных переменных модулей. Активный
+# контекст хранится в contextvars, поэтому вложенные хелперы (log, get_settings)
+# автоматически работают с ним, а два прогона в одном процессе не мешают друг другу.
+
+_GITHUBMIRROR_INDEX_RE = re.compile(r"(?:githubmirror/)?(\d+)\.txt")
+
+
+def _extract_index(msg: str) -> int:
+    """Пытается извлечь номер файла из строки вида '19.txt' или 'githubmirror/12.txt'."""
+    m = _GITHUBMIRROR_INDEX_RE.search(msg)
+    if m:
+        try:
+            return int(m.group(1))
+        except ValueError:
+            pass
+    return 0
+
+
+def moscow_now() -> datetime:
+    import zoneinfo
+
+    return datetime.now(zoneinfo.ZoneInfo("Europe/Moscow"))
+
+
+class RunMetrics:
+    """Потокобезопасные счётчики прогона."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[str, float] = {}
+
+    def incr(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def get(self, name: str, default: float = 0) -> float:
+        with self._lock:
+            return self._counters.get(name, default)
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            return dict(self._counters)
+
+
+class RunContext:
+    def __init__(
+        self,
+        settings: Settings | None = None,
+        clock: Callable[[], datetime] | None = None,
+        output_dir: str | None = None,
+        logs_by_file: dict[int, list[str]] | None = None,
+        updated_files: set[str] | None = None,
+        **settings_overrides,
+    ):
+        self._settings = settings
+        # output_dir и другие поля Settings (cache_dir, readme_path, git_root…) поверх глобальных
+        self._overrides = dict(settings_overrides)
+        if output_dir:
+            self._overrides["githubmirror_dir"] = output_dir
+        self.clock = clock or moscow_now
+        self._run_time: datetime | None = None
+        self.logs_by_file: dict[int, list[str]] = logs_by_file if logs_by_file is not None else defaultdict(list)
+        self.updated_files: set[str] = updated_files if updated_files is not None else set()
+        self.metrics = RunMetrics()
+        self._transport_stats = None
+        self._lock = threading.Lock()
+
+    # ---- настройки ----
+    @property
+    def settings(self) -> Settings:
+        """Настройки прогона; без явных настроек берутся глобальные (env/CLI)."""
+        with self._lock:
+            if self._settings is None:
+                settings = get_settings()
+                if self._overrides:
+                    settings = dataclasses.replace(settings, **self._overrides)
+                self._settings = settings
+            return self._settings
+
+    @property
+    def output_dir(self) -> str:
+        return self.settings.githubmirror_dir
+
+    # ---- время ----
+    @property
+    def run_time(self) -> datetime:
+        """Время запуска, зафиксированное при первом обращении."""
+        with self._lock:
+            if self._run_time is None:
+                self._run_time = self.clock()
+            return self._run_time
+
+    def offset(self) -> str:
+        return self.run_time.strftime("%H:%M (МСК) | %d.%m.%Y")
+
+    # ---- логи и результаты ----
+    def log(self, message: str):
+        idx = _extract_index(message)
+        with self._lock:
+            self.logs_by_file[idx].append(message)
+
+    def mark_updated(self, output: str):
+        """Отмечает выходной файл (например, "26.txt") изменившимся в этом прогоне."""
+        with self._lock:
+            self.updated_files.add(output)
+
+    def is_updated(self, output: str) -> bool:
+        with self._lock:
+            return output in self.updated_files
+
+    @property
+    def transport_stats(self):
+        from src.transport import TransportStats
+
+        with self._lock:
+            if self._transport_stats is None:
+                self._transport_stats = TransportStats()
+            return self._transport_stats
+
+    def format_logs(self) -> str:
+        with self._lock:
+            ordered_keys = sorted(k for k in self.logs_by_file if k != 0)
+            output_lines: list[str] = []
+            for k in ordered_keys:
+                output_lines.append(f"----- {k}.txt -----")
+                output_lines.extend(self.logs_by_file[k])
+            if self.logs_by_file.get(0):
+                output_lines.append("----- Общие сообщения -----")
+                output_lines.extend(self.logs_by_file[0])
+        return "\n".join(output_lines)
+
+    @contextmanager
+    def activate(self):
+        """Делает контекст текущим для log()/get_settings() в этом потоке (и в задачах,
+        запущенных через contextvars.copy_context())."""
+        ctx_token = _CURRENT.set(self)
+        settings_token = _ACTIVE_SETTINGS.set(self.settings)
+        try:
+            yield self
+        finally:
+            _ACTIVE_SETTINGS.reset(settings_token)
+            _CURRENT.reset(ctx_token)
+
+
+_CURRENT: contextvars.ContextVar[RunContext | None] = contextvars.ContextVar("run_context", default=None)
+_DEFAULT: RunContext | None = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_context() -> RunContext:
+    """Контекст по умолчанию — для кода, вызываемого вне явного прогона."""
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = RunContext()
+        return _DEFAULT
+
+
+def current_context() -> RunContext:
+    return _CURRENT.get() or default_context()
+
+
+def with_context(fn):
+    """Декоратор для API-функций: принимает ctx=None (берётся текущий контекст)
+    и активирует его на время вызова, чтобы вложенные хелперы писали в тот же прогон."""
+
+    @wraps(fn)
+    def wrapper(*args, ctx: RunContext | None = None, **kwargs):
+        ctx = ctx or current_context()
+        if _CURRENT.get() is ctx:
+            return fn(*args, ctx=ctx, **kwargs)
+        with ctx.activate():
+            return fn(*args, ctx=ctx, **kwargs)
+
+    return wrapper
+
+
+_PATH_LOCKS: dict[str, threading.Lock] = {}
+_PATH_LOCKS_GUARD = threading.Lock()
+
+
+def path_lock(path: str) -> threading.Lock:
+    """Процессный замок на путь: прогоны с общим README.md или git-репозиторием
+    правят и коммитят их по очереди, а не одновременно."""
+    key = os.path.abspath(path)
+    with _PATH_LOCKS_GUARD:
+        lock = _PATH_LOCKS.get(key)
+        if lock is None:
+            lock = _PATH_LOCKS[key] = threading.Lock()
+        return lock
+
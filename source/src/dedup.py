@@ -0,0 +1,98 @@
+import hashlib
+from array import array
+
+# -------------------- КОМПАКТНАЯ ДЕДУПЛИКАЦИЯ --------------------
+# Вместо set[str] с полными строками конфигов храним фиксированные дайджесты
+# (64 или 128 бит) в хэш-таблице с открытой адресацией поверх array('Q').
+# Слот занимает 8/16 байт против ~100+ байт на строку в обычном set.
+
+_MAX_LOAD = 0.6
+
+
+def config_digest(value: str) -> bytes:
+    """128-битный дайджест полной строки конфига."""
+    return hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+
+
+def hostport_digest(host: str, port: str) -> bytes:
+    """64-битный дайджест пары host:port (host без учёта регистра)."""
+    return hashlib.blake2b(f"{host.lower()}:{port}".encode("utf-8"), digest_size=8).digest()
+
+
+class DigestSet:
+    """Множество дайджестов фиксированной ширины (8 или 16 байт).
+
+    Нулевое первое слово зарезервировано под пустой слот, поэтому младший бит
+    первого слова всегда выставляется в 1 (теряется 1 бит энтропии)."""
+
+    __slots__ = ("_words", "_table", "_mask", "_size")
+
+    def __init__(self, digest_size: int = 8, capacity: int = 1024):
+        if digest_size not in (8, 16):
+            raise ValueError("digest_size должен быть 8 или 16 байт")
+        self._words = digest_size // 8
+        slots = 1
+        while slots < max(8, int(capacity / _MAX_LOAD) + 1):
+            slots <<= 1
+        self._mask = slots - 1
+        self._table = array("Q", [0]) * (self._words * slots)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def nbytes(self) -> int:
+        return self._table.itemsize * len(self._table)
+
+    def _split(self, digest: bytes) -> tuple[int, int]:
+        first = int.from_bytes(digest[:8], "little") | 1
+        second = int.from_bytes(digest[8:16], "little") if self._words == 2 else 0
+        return first, second
+
+    def _find(self, first: int, second: int) -> tuple[int, bool]:
+        """Возвращает (индекс первого слова слота, найден ли ключ)."""
+        table, words, mask = self._table, self._words, self._mask
+        slot = first & mask
+        while True:
+            base = slot * words
+            current = table[base]
+            if current == 0:
+                return base, False
+            if current == first and (words == 1 or table[base + 1] == second):
+                return base, True
+            slot = (slot + 1) & mask
+
+    def __contains__(self, digest: bytes) -> bool:
+        return self._find(*self._split(digest))[1]
+
+    def add(self, digest: bytes) -> bool:
+        """Добавляет дайджест. Возвращает True, если его ещё не было."""
+        first, second = self._split(digest)
+        base, found = self._find(first, second)
+        if found:
+            return False
+        table = self._table
+        table[base] = first
+        if self._words == 2:
+            table[base + 1] = second
+        self._size += 1
+        if self._size > (self._mask + 1) * _MAX_LOAD:
+            self._grow()
+        return True
+
+    def _grow(self):
+        old_table, words = self._table, self._words
+        slots = (self._mask + 1) * 2
+        mask = self._mask = slots - 1
+        table = self._table = array("Q", [0]) * (words * slots)
+        for old_base in range(0, len(old_table), words):
+            first = old_table[old_base]
+            if not first:
+                continue
+            slot = first & mask
+            while table[slot * words]:
+                slot = (slot + 1) & mask
+            table[slot * words] = first
+            if words == 2:
+                table[slot * words + 1] = old_table[old_base + 1]
@@ -3,19 +3,20 @@ import urllib.parse
 import json
 import re
 import base64
-import concurrent.futures
-from src.config import (
-    URLS,
-    LOCAL_PATHS,
-    GITHUBMIRROR_DIR,
-    SNI_DOMAINS_PATH,
-    EXTRA_URLS_FOR_26,
-    EXTRA_URL_TIMEOUT,
-    EXTRA_URL_MAX_ATTEMPTS,
-)
+import hashlib
+import tempfile
+import tracemalloc
+from typing import Iterable
+from src.config import get_settings
+from src.context import RunContext, with_context
 from src.logger import log
 from src.network import fetch_data, _format_fetch_error
-from src.parser import filter_insecure_configs
+from src.parser import filter_insecure_configs, format_rejections
+from src.poll_scheduler import get_poll_scheduler
+from src.sources import Aggregate, Source
+from src.artifacts import update_variants
+from src.dedup import DigestSet, config_digest, hostport_digest
+from src.ordering import order_configs, reorder_stable_file, same_content
 
 # -------------------- ЛОКАЛЬНЫЕ ФАЙЛЫ --------------------
 
@@ -38,46 +39,94 @@ def extract_source_name(url: str) -> str:
         return "Источник"
 
 
-def download_and_save(idx: int) -> tuple[str, int] | None:
-    """Скачивает файл, фильтрует и сохраняет локально.
-    Возвращает (local_path, file_index) если файл изменился, иначе None."""
-    url = URLS[idx]
-    local_path = LOCAL_PATHS[idx]
-    file_index = idx + 1
+@with_context
+def download_and_save(source: Source, *, ctx: RunContext) -> tuple[str, str] | None:
+    """Скачивает источник, фильтрует и сохраняет локально в source.output.
+    Возвращает (local_path, output) если файл изменился, иначе None."""
+    settings = ctx.settings
+    url = source.url
+    output = source.output
+    local_path = os.path.join(settings.githubmirror_dir, output)
+    scheduler = get_poll_scheduler()
+    if os.path.exists(local_path) and not scheduler.is_due(url, adaptive=source.adaptive_polling):
+        ctx.metrics.incr("poll_skipped")
+        minutes = scheduler.next_interval(url) // 60
+        log(f"⏭️ {output} пропущен: источник стабилен (интервал опроса {minutes} мин)")
+        update_variants(local_path)
+        return None
     try:
-        data = fetch_data(url)
-        data, _ = filter_insecure_configs(local_path, data)
+        if source.timeout is not None:
+            data = fetch_data(url, timeout=source.timeout)
+        else:
+            data = fetch_data(url)
+        data, _, _ = filter_insecure_configs(local_path, data)
+        data = "\n".join(order_configs(data.splitlines(), local_path, settings.output_order))
 
         if os.path.exists(local_path):
             try:
                 with open(local_path, "r", encoding="utf-8") as f:
                     if f.read() == data:
                         config_count = len([line for line in data.splitlines() if line.strip()])
-                        log(f"🔄 Изменений для {file_index}.txt нет ({config_count} конфигов).")
+                        log(f"🔄 Изменений для {output} нет ({config_count} конфигов).")
+                        scheduler.record(url, changed=False)
+                        update_variants(local_path)
                         return None
             except Exception:
                 pass
 
         save_to_local_file(local_path, data)
-        return local_path, file_index
+        scheduler.record(url, changed=True)
+        update_variants(local_path)
+        return local_path, output
 
     except Exception as e:
+        scheduler.record(url, changed=None)
         short_msg = str(e)
         if len(short_msg) > 200:
             short_msg = short_msg[:200] + "…"
-        log(f"⚠️ Ошибка при скачивании {file_index}.txt ({url}): {short_msg}")
+        log(f"⚠️ Ошибка при скачивании {output} ({url}): {short_msg}")
         return None
 
-# -------------------- 26-й ФАЙЛ --------------------
+# -------------------- АГРЕГАТЫ (26.txt и др.) --------------------
+# Агрегаты (config/outputs.json) собираются из уже скачанных файлов источников
+# и дополнительных URL. Источники читаются шардами по aggregate_shard_size:
+# каждый шард сбрасывает подходящие конфиги во временный файл, а запись агрегата
+# читает шарды построчно, так что память не растёт с числом источников.
+_HOST_PORT_RE = re.compile(r"(?:@|//)([\w\.-]+):(\d{1,5})")
+
 
-def create_filtered_configs() -> str:
-    """Создаёт 26-й файл: конфиги для SNI/CIDR белых списков."""
+def _extract_host_port(line: str) -> tuple[str, str] | None:
+    if not line:
+        return None
+    if line.startswith("vmess://"):
+        try:
+            payload = line[8:]
+            rem = len(payload) % 4
+            if rem:
+                payload += "=" * (4 - rem)
+            decoded = base64.b64decode(payload).decode("utf-8", errors="ignore")
+            if decoded.startswith("{"):
+                j = json.loads(decoded)
+                host = j.get("add") or j.get("host") or j.get("ip")
+                port = j.get("port")
+                if host and port:
+                    return str(host), str(port)
+        except Exception:
+            pass
+        return None
+    m = _HOST_PORT_RE.search(line)
+    return (m.group(1), m.group(2)) if m else None
+
+
+def build_sni_matcher() -> re.Pattern | None:
+    """Компилирует regex по белому списку SNI-доменов. None — список недоступен."""
+    settings = get_settings()
     try:
-        with open(SNI_DOMAINS_PATH, "r", encoding="utf-8") as f:
+        with open(settings.sni_domains_path, "r", encoding="utf-8") as f:
             sni_domains = json.load(f)
     except Exception as e:
-        log(f"❌ Ошибка загрузки {SNI_DOMAINS_PATH}: {e}")
-        return os.path.join(GITHUBMIRROR_DIR, "26.txt")
+        log(f"❌ Ошибка загрузки {settings.sni_domains_path}: {e}")
+        return None
 
     # Оптимизация: убираем домены, которые являются подстрокой уже добавленных
     sorted_domains = sorted(sni_domains, key=len)
@@ -87,113 +136,191 @@ def create_filtered_configs() -> str:
             optimized_domains.append(d)
 
     try:
-        sni_regex = re.compile(r"(?:" + "|".join(re.escape(d) for d in optimized_domains) + r")")
+        return re.compile(r"(?:" + "|".join(re.escape(d) for d in optimized_domains) + r")")
     except Exception as e:
         log(f"❌ Ошибка компиляции Regex: {e}")
-        return os.path.join(GITHUBMIRROR_DIR, "26.txt")
+        return None
 
-    def _extract_host_port(line: str) -> tuple[str, str] | None:
-        if not line:
-            return None
-        if line.startswith("vmess://"):
-            try:
-                payload = line[8:]
-                rem = len(payload) % 4
-                if rem:
-                    payload += "=" * (4 - rem)
-                decoded = base64.b64decode(payload).decode("utf-8", errors="ignore")
-                if decoded.startswith("{"):
-                    j = json.loads(decoded)
-                    host = j.get("add") or j.get("host") or j.get("ip")
-                    port = j.get("port")
-                    if host and port:
-                        return str(host), str(port)
-            except Exception:
-                pass
-            return None
-        m = re.search(r"(?:@|//)([\w\.-]+):(\d{1,5})", line)
-        return (m.group(1), m.group(2)) if m else None
-
-    def _process_file_filtering(file_idx: int) -> list[str]:
-        local_path = os.path.join(GITHUBMIRROR_DIR, f"{file_idx}.txt")
-        if not os.path.exists(local_path):
-            return []
+
+def _iter_local_configs(output: str, sni_regex: re.Pattern | None):
+    """Построчно читает файл источника и отдаёт конфиги, подходящие под SNI
+    (sni_regex=None — без фильтра), не читая файл целиком."""
+    local_path = os.path.join(get_settings().githubmirror_dir, output)
+    if not os.path.exists(local_path):
+        return
+    try:
+        with open(local_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and (sni_regex is None or sni_regex.search(line)):
+                    yield line
+    except Exception:
+        return
+
+
+def spool_aggregate_shard(aggregate: Aggregate, sources: list[Source], sni_regex: re.Pattern | None) -> str | None:
+    """Шард агрегата: конфиги группы источников во временном файле в cache_dir.
+    Возвращает путь (его потребляет iter_spooled) или None, если шард пуст."""
+    if aggregate.sni_filter and sni_regex is None:
+        return None
+    spool_dir = os.path.join(get_settings().cache_dir, "aggregate")
+    os.makedirs(spool_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix=f"{aggregate.id}-", suffix=".txt", dir=spool_dir)
+    written = 0
+    with os.fdopen(fd, "w", encoding="utf-8") as out:
+        for source in sources:
+            for line in _iter_local_configs(source.output, sni_regex if aggregate.sni_filter else None):
+                out.write(line)
+                out.write("\n")
+                written += 1
+    if not written:
+        os.remove(path)
+        return None
+    return path
+
+
+def iter_spooled(path: str | None):
+    """Построчно читает шард и удаляет его после чтения."""
+    if path is None:
+        return
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield line.rstrip("\n")
+    finally:
         try:
-            with open(local_path, "r", encoding="utf-8") as f:
-                content = f.read()
-            return [
-                line.strip()
-                for line in content.splitlines()
-                if line.strip() and sni_regex.search(line.strip())
-            ]
-        except Exception:
-            return []
+            os.remove(path)
+        except OSError:
+            pass
+
 
-    all_configs: list[str] = []
+def _extra_cache_path(url: str) -> str:
+    name = hashlib.blake2b(url.encode("utf-8"), digest_size=8).hexdigest()
+    return os.path.join(get_settings().cache_dir, "extra_26", f"{name}.txt")
 
-    max_workers = min(16, (os.cpu_count() or 1) + 4)
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        for result in concurrent.futures.as_completed(
-            [executor.submit(_process_file_filtering, i) for i in range(1, 26)]
-        ):
-            all_configs.extend(result.result())
 
-    def _load_extra_configs(url: str) -> tuple[list[str], int]:
-        count_removed = 0
-        configs: list[str] = []
+@with_context
+def load_extra_configs(url: str, aggregate: Aggregate, *, ctx: RunContext) -> tuple[str, int]:
+    """Скачивает дополнительный источник агрегата.
+    Возвращает (отфильтрованные конфиги, число отброшенных небезопасных)."""
+    settings = ctx.settings
+    scheduler = get_poll_scheduler()
+    count_removed = 0
+    data = ""
+    cache_path = _extra_cache_path(url)
+    # Стабильный источник не перекачиваем: берём отфильтрованную копию из кэша
+    if os.path.exists(cache_path) and not scheduler.is_due(url, adaptive=aggregate.adaptive_polling):
         try:
-            data = fetch_data(
-                url,
-                timeout=EXTRA_URL_TIMEOUT,
-                max_attempts=EXTRA_URL_MAX_ATTEMPTS,
-                allow_http_downgrade=False,
-            )
-            data, count_removed = filter_insecure_configs(
-                os.path.join(GITHUBMIRROR_DIR, "26.txt"), data, log_enabled=False
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cached = f.read()
+            ctx.metrics.incr("poll_skipped")
+            return cached, 0
+        except Exception:
+            pass
+    try:
+        data = fetch_data(
+            url,
+            timeout=settings.extra_url_timeout,
+            max_attempts=settings.extra_url_max_attempts,
+            allow_http_downgrade=False,
+        )
+        data, count_removed, invalid = filter_insecure_configs(
+            os.path.join(settings.githubmirror_dir, aggregate.output), data, log_enabled=False
+        )
+        if invalid:
+            log(
+                f"ℹ️ Отброшено {sum(invalid.values())} невалидных конфигов для {aggregate.output} "
+                f"из {extract_source_name(url)} ({format_rejections(invalid)})"
             )
-            configs = data.splitlines()
-        except Exception as e:
-            log(f"⚠️ Ошибка при загрузке 26.txt ({url}): {_format_fetch_error(e)}")
-        return configs, count_removed
-
-    total_insecure_filtered_26 = 0
-    with concurrent.futures.ThreadPoolExecutor(
-        max_workers=max(1, min(4, len(EXTRA_URLS_FOR_26)))
-    ) as executor:
-        for future in concurrent.futures.as_completed(
-            [executor.submit(_load_extra_configs, u) for u in EXTRA_URLS_FOR_26]
-        ):
-            res_configs, res_count = future.result()
-            all_configs.extend(res_configs)
-            total_insecure_filtered_26 += res_count
-
-    if total_insecure_filtered_26 > 0:
-        log(f"ℹ️ Отфильтровано {total_insecure_filtered_26} небезопасных конфигов для 26.txt")
-
-    # Дедупликация
-    seen_full: set[str] = set()
-    seen_hostport: set[str] = set()
-    unique_configs: list[str] = []
-
-    for cfg in all_configs:
-        c = cfg.strip()
-        if not c or c in seen_full:
-            continue
-        seen_full.add(c)
-        hostport = _extract_host_port(c)
-        if hostport:
-            key = f"{hostport[0].lower()}:{hostport[1]}"
-            if key in seen_hostport:
-                continue
-            seen_hostport.add(key)
-        unique_configs.append(c)
-
-    local_path_26 = os.path.join(GITHUBMIRROR_DIR, "26.txt")
+    except Exception as e:
+        log(f"⚠️ Ошибка при загрузке {aggregate.output} ({url}): {_format_fetch_error(e)}")
+        scheduler.record(url, changed=None)
+        return data, count_removed
+
+    digest = hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+    scheduler.record(url, changed=digest != scheduler.digest(url), digest=digest)
     try:
-        with open(local_path_26, "w", encoding="utf-8") as f:
-            f.write("\n".join(unique_configs))
-        log(f"📁 Создан файл 26.txt с {len(unique_configs)} конфигами")
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(cache_path + ".tmp", cache_path)
+    except Exception:
+        pass
+    return data, count_removed
+
+
+@with_context
+def write_aggregate(
+    aggregate: Aggregate, shards: Iterable[tuple[Iterable[str], int]], *, ctx: RunContext
+) -> tuple[str, bool]:
+    """Дедуплицирует и атомарно записывает агрегат.
+    shards — последовательность (конфиги, число отброшенных небезопасных) в порядке источников;
+    потребляется лениво. Возвращает (путь, изменилось ли содержимое)."""
+    settings = ctx.settings
+    mirror_dir = settings.githubmirror_dir
+    name = aggregate.output
+
+    # Трассировку включает run_pipeline (TRACE_MEMORY); здесь только снимки до и после,
+    # чтобы параллельные сборки не выключали общую на процесс трассировку друг другу.
+    snapshot = tracemalloc.take_snapshot() if settings.trace_memory and tracemalloc.is_tracing() else None
+
+    local_path = os.path.join(mirror_dir, name)
+    tmp_path = local_path + ".tmp"
+    ordered_path = local_path + ".ordered.tmp"
+    changed = False
+
+    # Дедупликация по дайджестам: полная строка (128 бит) и host:port (64 бита)
+    seen_full = DigestSet(digest_size=16)
+    seen_hostport = DigestSet(digest_size=8)
+    written = 0
+    total_insecure_filtered = 0
+
+    try:
+        os.makedirs(mirror_dir, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            for configs, insecure_count in shards:
+                total_insecure_filtered += insecure_count
+                if settings.output_order == "fingerprint":
+                    configs = sorted((c.strip() for c in configs), key=config_digest)
+                for cfg in configs:
+                    c = cfg.strip()
+                    if not c or not seen_full.add(config_digest(c)):
+                        continue
+                    hostport = _extract_host_port(c)
+                    if hostport and not seen_hostport.add(hostport_digest(*hostport)):
+                        continue
+                    if written:
+                        out.write("\n")
+                    out.write(c)
+                    written += 1
+
+        if settings.output_order == "stable":
+            reorder_stable_file(tmp_path, local_path, ordered_path)
+            os.replace(ordered_path, tmp_path)
+
+        if os.path.exists(local_path) and same_content(tmp_path, local_path):
+            log(f"🔄 Изменений для {name} нет ({written} конфигов).")
+        else:
+            os.replace(tmp_path, local_path)
+            changed = True
+            log(f"📁 Создан файл {name} с {written} конфигами")
+        update_variants(local_path)
     except Exception as e:
-        log(f"⚠️ Ошибка при сохранении 26.txt: {e}")
+        log(f"⚠️ Ошибка при сохранении {name}: {e}")
+    finally:
+        for path in (tmp_path, ordered_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    if total_insecure_filtered > 0:
+        log(f"ℹ️ Отфильтровано {total_insecure_filtered} небезопасных конфигов для {name}")
+
+    if snapshot is not None:
+        held = sum(stat.size_diff for stat in tracemalloc.take_snapshot().compare_to(snapshot, "filename"))
+        log(
+            f"📈 Память при сборке {name}: +{held / 1024 / 1024:.1f} МБ "
+            f"(дедуп-таблицы: {(seen_full.nbytes + seen_hostport.nbytes) / 1024:.0f} КБ)"
+        )
+
+    return local_path, changed
 
-    return local_path_26
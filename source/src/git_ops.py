@@ -1,33 +1,70 @@
 import subprocess
 import os
-from src.config import GITHUBMIRROR_DIR, README_PATH, GIT_ROOT
-from src.logger import log, offset
+from src.context import RunContext, path_lock, with_context
+from src.logger import log
 
 # -------------------- GIT --------------------
 
-def git_commit_and_push(dry_run: bool = False):
-    """Добавляет изменённые файлы в индекс, делает коммит и пушит."""
+def _log_commit_churn(git_root: str):
+    """Логирует число изменённых строк в индексе — метрика «веса» коммита для истории git."""
+    try:
+        numstat = subprocess.run(
+            ["git", "diff", "--cached", "--numstat"],
+            cwd=git_root,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+    except subprocess.CalledProcessError:
+        return
+    added = deleted = files = 0
+    for line in numstat.splitlines():
+        parts = line.split("\t")
+        if len(parts) < 3:
+            continue
+        files += 1
+        # Для бинарных файлов git выводит "-"
+        if parts[0].isdigit():
+            added += int(parts[0])
+        if parts[1].isdigit():
+            deleted += int(parts[1])
+    log(f"📉 Строк в коммите: +{added} / -{deleted} (файлов: {files})")
+
+
+@with_context
+def git_commit_and_push(dry_run: bool = False, *, ctx: RunContext):
+    """Добавляет изменённые файлы в индекс, делает коммит и пушит.
+    Прогоны в одном репозитории коммитят по очереди."""
+    with path_lock(ctx.settings.git_root):
+        _git_commit_and_push(dry_run, ctx)
+
+
+def _git_commit_and_push(dry_run: bool, ctx: RunContext):
+    settings = ctx.settings
+    git_root = settings.git_root
     try:
         subprocess.run(
             ["git", "add",
-             os.path.relpath(GITHUBMIRROR_DIR, GIT_ROOT),
-             os.path.relpath(README_PATH, GIT_ROOT)],
+             os.path.relpath(settings.githubmirror_dir, git_root),
+             os.path.relpath(settings.readme_path, git_root)],
             check=True,
-            cwd=GIT_ROOT,
+            cwd=git_root,
         )
 
         diff = subprocess.run(
             ["git", "diff", "--cached", "--quiet"],
-            cwd=GIT_ROOT,
+            cwd=git_root,
         )
         if diff.returncode == 0:
             log("ℹ️ Нет изменений для коммита")
             return
 
+        _log_commit_churn(git_root)
+
         subprocess.run(
-            ["git", "commit", "-m", f"🚀 Автообновление репозитория: {offset}"],
+            ["git", "commit", "-m", f"🚀 Автообновление репозитория: {ctx.offset()}"],
             check=True,
-            cwd=GIT_ROOT,
+            cwd=git_root,
         )
         log("✅ Коммит создан")
 
@@ -35,7 +72,7 @@ def git_commit_and_push(dry_run: bool = False):
             log("ℹ️ Dry-run: push пропущен")
             return
 
-        subprocess.run(["git", "push"], check=True, cwd=GIT_ROOT)
+        subprocess.run(["git", "push"], check=True, cwd=git_root)
         log("✅ Изменения запушены в репозиторий")
 
     except subprocess.CalledProcessError as e:
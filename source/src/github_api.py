@@ -1,63 +1,87 @@
+import json
+import os
+import time
 from src.logger import log
-from src.config import GITHUB_TOKEN, REPO_NAME
+from src.config import get_settings
+from src.network import get_session
 
 # -------------------- GITHUB API (только для статистики) --------------------
-_repo_stats_client = None
-REPO = None
-_initialized = False
+_TRAFFIC_KINDS = ("views", "clones")
 
 
-def _ensure_initialized():
-    """Ленивая инициализация GitHub-клиента (не блокирует импорт модуля)."""
-    global _repo_stats_client, REPO, _initialized
-    if _initialized:
-        return
-    _initialized = True
+def _stats_cache_path() -> str:
+    return os.path.join(get_settings().cache_dir, "repo_stats.json")
 
-    if not GITHUB_TOKEN:
-        log("⚠️ MY_TOKEN не задан — статистика репозитория недоступна")
-        return
 
+def _load_stats_cache() -> dict:
     try:
-        from github import Github, Auth
-        _repo_stats_client = Github(auth=Auth.Token(GITHUB_TOKEN))
-        REPO = _repo_stats_client.get_repo(REPO_NAME)
-        try:
-            remaining, limit = _repo_stats_client.rate_limiting
-            if remaining < 100:
-                log(f"⚠️ Внимание: осталось {remaining}/{limit} запросов к GitHub API")
-            else:
-                log(f"ℹ️ Доступно запросов к GitHub API: {remaining}/{limit}")
-        except Exception as e:
-            log(f"⚠️ Не удалось проверить лимиты GitHub API: {e}")
-    except ImportError:
-        log("⚠️ PyGithub не установлен — статистика репозитория недоступна")
+        with open(_stats_cache_path(), "r", encoding="utf-8") as f:
+            data = json.load(f)
+            return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _save_stats_cache(cache: dict):
+    path = _stats_cache_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        log(f"⚠️ Не удалось сохранить кэш статистики: {e}")
+
+
+def _log_rate_limit(response):
+    """Логирует остаток лимита по заголовкам ответа (без отдельного запроса к /rate_limit)."""
+    remaining = response.headers.get("X-RateLimit-Remaining")
+    limit = response.headers.get("X-RateLimit-Limit")
+    if remaining is None or limit is None:
+        return
+    try:
+        if int(remaining) < 100:
+            log(f"⚠️ Внимание: осталось {remaining}/{limit} запросов к GitHub API")
+        else:
+            log(f"ℹ️ Доступно запросов к GitHub API: {remaining}/{limit}")
+    except ValueError:
+        pass
+
+
+def _fetch_traffic(kind: str, cached: dict | None) -> tuple[dict, bool]:
+    """Запрашивает /traffic/{kind} с If-None-Match.
+    Возвращает (запись кэша, был ли ответ 304 Not Modified)."""
+    settings = get_settings()
+    headers = {
+        "Authorization": f"Bearer {settings.github_token}",
+        "Accept": "application/vnd.github+json",
+        "X-GitHub-Api-Version": "2022-11-28",
+    }
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+
+    response = get_session().get(
+        f"{settings.github_api_url}/repos/{settings.repo_name}/traffic/{kind}",
+        headers=headers,
+        timeout=10,
+    )
+    _log_rate_limit(response)
+    if response.status_code == 304 and cached:
+        return cached, True
+    response.raise_for_status()
+
+    count, uniques = _traffic_counts(response.json())
+    return {"etag": response.headers.get("ETag"), "count": count, "uniques": uniques}, False
 
 
 def _traffic_counts(traffic) -> tuple[int, int]:
-    if traffic is None:
-        return 0, 0
-    if isinstance(traffic, tuple) and len(traffic) >= 2:
-        if isinstance(traffic[0], (int, float)) and isinstance(traffic[1], (int, float)):
-            return int(traffic[0]), int(traffic[1])
     if isinstance(traffic, dict):
         if "count" in traffic or "uniques" in traffic:
             return int(traffic.get("count", 0)), int(traffic.get("uniques", 0))
         items = traffic.get("views") or traffic.get("clones") or []
         return _sum_traffic_items(items)
-    if hasattr(traffic, "count") and hasattr(traffic, "uniques"):
-        return int(getattr(traffic, "count", 0) or 0), int(getattr(traffic, "uniques", 0) or 0)
-    for attr in ("views", "clones"):
-        if hasattr(traffic, attr):
-            return _sum_traffic_items(getattr(traffic, attr) or [])
-    if hasattr(traffic, "raw_data"):
-        raw = getattr(traffic, "raw_data") or {}
-        if isinstance(raw, dict):
-            if "count" in raw or "uniques" in raw:
-                return int(raw.get("count", 0)), int(raw.get("uniques", 0))
-            items = raw.get("views") or raw.get("clones") or []
-            return _sum_traffic_items(items)
-    if isinstance(traffic, (list, tuple)):
+    if isinstance(traffic, list):
         return _sum_traffic_items(traffic)
     return 0, 0
 
@@ -68,34 +92,52 @@ def _sum_traffic_items(items) -> tuple[int, int]:
         if isinstance(item, dict):
             total_count += int(item.get("count", 0) or 0)
             total_uniques += int(item.get("uniques", 0) or 0)
-        else:
-            total_count += int(getattr(item, "count", 0) or 0)
-            total_uniques += int(getattr(item, "uniques", 0) or 0)
     return total_count, total_uniques
 
 
-def get_repo_stats() -> dict | None:
-    _ensure_initialized()
-    if REPO is None:
-        return None
+def _stats_from_cache(cache: dict) -> dict[str, int] | None:
     stats: dict[str, int] = {}
-    try:
-        views_count, views_uniques = _traffic_counts(REPO.get_views_traffic())
-        stats["views_count"] = views_count
-        stats["views_uniques"] = views_uniques
-    except Exception as e:
-        log(f"⚠️ Не удалось получить просмотры: {e}")
-        return None
-    try:
-        clones_count, clones_uniques = _traffic_counts(REPO.get_clones_traffic())
-        stats["clones_count"] = clones_count
-        stats["clones_uniques"] = clones_uniques
-    except Exception as e:
-        log(f"⚠️ Не удалось получить клоны: {e}")
-        return None
+    for kind in _TRAFFIC_KINDS:
+        entry = cache.get(kind)
+        if not isinstance(entry, dict):
+            return None
+        stats[f"{kind}_count"] = int(entry.get("count", 0))
+        stats[f"{kind}_uniques"] = int(entry.get("uniques", 0))
     return stats
 
 
+def get_repo_stats() -> dict | None:
+    """Возвращает статистику просмотров/клонов.
+    Данные кэшируются на диске и ревалидируются не чаще repo_stats_cache_ttl секунд."""
+    settings = get_settings()
+    cache = _load_stats_cache()
+    cached_stats = _stats_from_cache(cache)
+    if cached_stats and time.time() - float(cache.get("checked_at", 0)) < settings.repo_stats_cache_ttl:
+        log("ℹ️ Статистика репозитория взята из кэша")
+        return cached_stats
+
+    if not settings.github_token:
+        log("⚠️ MY_TOKEN не задан — статистика репозитория недоступна")
+        return cached_stats
+
+    new_cache: dict = {}
+    not_modified = True
+    for kind in _TRAFFIC_KINDS:
+        try:
+            new_cache[kind], kind_not_modified = _fetch_traffic(kind, cache.get(kind))
+            not_modified = not_modified and kind_not_modified
+        except Exception as e:
+            label = "просмотры" if kind == "views" else "клоны"
+            log(f"⚠️ Не удалось получить {label}: {e}")
+            return cached_stats
+
+    if not_modified:
+        log("ℹ️ Статистика репозитория не изменилась (304)")
+    new_cache["checked_at"] = time.time()
+    _save_stats_cache(new_cache)
+    return _stats_from_cache(new_cache)
+
+
 def build_repo_stats_table(stats: dict) -> str:
     def _fmt(v) -> str:
         try:
@@ -1,37 +1,9 @@
-from collections import defaultdict
-import threading
-import re
-import zoneinfo
-from datetime import datetime
+from src.context import current_context
 
 # -------------------- ЛОГИРОВАНИЕ --------------------
-LOGS_BY_FILE: dict[int, list[str]] = defaultdict(list)
-_LOG_LOCK = threading.Lock()
-_UPDATED_FILES_LOCK = threading.Lock()
-
-_GITHUBMIRROR_INDEX_RE = re.compile(r"(?:githubmirror/)?(\d+)\.txt")
-updated_files: set[int] = set()
-
-
-def _extract_index(msg: str) -> int:
-    """Пытается извлечь номер файла из строки вида '19.txt' или 'githubmirror/12.txt'."""
-    m = _GITHUBMIRROR_INDEX_RE.search(msg)
-    if m:
-        try:
-            return int(m.group(1))
-        except ValueError:
-            pass
-    return 0
+# Логи принадлежат RunContext (src.context); log() пишет в текущий контекст прогона.
 
 
 def log(message: str):
-    """Добавляет сообщение в общий словарь логов потокобезопасно."""
-    idx = _extract_index(message)
-    with _LOG_LOCK:
-        LOGS_BY_FILE[idx].append(message)
-
-
-# -------------------- ВРЕМЯ --------------------
-zone = zoneinfo.ZoneInfo("Europe/Moscow")
-thistime = datetime.now(zone)
-offset = thistime.strftime("%H:%M (МСК) | %d.%m.%Y")
+    """Добавляет сообщение в логи текущего прогона потокобезопасно."""
+    current_context().log(message)
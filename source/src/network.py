@@ -1,12 +1,17 @@
+from __future__ import annotations
+
+import threading
 import urllib.parse
-import requests
-import urllib3
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
-from src.config import URLS, DEFAULT_MAX_WORKERS
+from typing import TYPE_CHECKING
+from src.config import get_settings
+from src.transport import RequestsTransport, get_transport
+
+if TYPE_CHECKING:
+    import requests
 
 # -------------------- HTTP-СЕССИЯ --------------------
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# requests/urllib3 импортируются лениво: их загрузка заметно удлиняет старт,
+# а многим инструментам, импортирующим пакет, сеть не нужна вовсе.
 
 CHROME_UA = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -16,6 +21,13 @@ CHROME_UA = (
 
 
 def _build_session(max_pool_size: int) -> requests.Session:
+    import requests
+    import urllib3
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
     session = requests.Session()
     adapter = HTTPAdapter(
         pool_connections=max_pool_size,
@@ -29,11 +41,29 @@ def _build_session(max_pool_size: int) -> requests.Session:
     )
     session.mount("http://", adapter)
     session.mount("https://", adapter)
+    # Accept-Encoding не переопределяем: requests берёт его из urllib3, который сам
+    # добавляет br/zstd, если установлены brotli/zstandard и он умеет их распаковывать.
     session.headers.update({"User-Agent": CHROME_UA})
     return session
 
 
-REQUESTS_SESSION = _build_session(max_pool_size=max(DEFAULT_MAX_WORKERS, len(URLS)))
+_SESSIONS: dict[int, requests.Session] = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Пуловая сессия под размер пула текущих настроек; создаётся при первом сетевом запросе.
+    Прогоны с одинаковыми настройками делят одну сессию и её соединения."""
+    settings = get_settings()
+    max_pool_size = max(settings.max_workers, len(settings.urls))
+    session = _SESSIONS.get(max_pool_size)
+    if session is None:
+        with _SESSIONS_LOCK:
+            session = _SESSIONS.get(max_pool_size)
+            if session is None:
+                session = _SESSIONS[max_pool_size] = _build_session(max_pool_size=max_pool_size)
+    return session
+
 
 # -------------------- ПОЛУЧЕНИЕ ДАННЫХ --------------------
 
@@ -44,7 +74,9 @@ def fetch_data(
     session: requests.Session | None = None,
     allow_http_downgrade: bool = True,
 ) -> str:
-    sess = session or REQUESTS_SESSION
+    import requests
+
+    transport = RequestsTransport(session) if session is not None else get_transport()
     last_exc: Exception = RuntimeError("No attempts made")
     for attempt in range(1, max_attempts + 1):
         try:
@@ -59,9 +91,7 @@ def fetch_data(
                     modified_url = parsed._replace(scheme="http").geturl()
                 verify = False
 
-            response = sess.get(modified_url, timeout=timeout, verify=verify)
-            response.raise_for_status()
-            return response.text
+            return transport.get(modified_url, timeout=timeout, verify=verify).text
 
         except requests.exceptions.RequestException as exc:
             last_exc = exc
@@ -71,6 +101,8 @@ def fetch_data(
 
 
 def _format_fetch_error(exc: Exception) -> str:
+    import requests
+
     if isinstance(exc, requests.exceptions.ConnectTimeout):
         return "Connect timeout"
     if isinstance(exc, requests.exceptions.ReadTimeout):
@@ -0,0 +1,82 @@
+import filecmp
+import os
+from collections import Counter
+from src.dedup import DigestSet, config_digest
+
+# -------------------- ПОРЯДОК СТРОК В ВЫХОДНЫХ ФАЙЛАХ --------------------
+# Коммиты идут каждые 9 минут, поэтому перестановка строк без изменения
+# содержимого раздувает историю git и диффы у клиентов. Режимы:
+#   stable      — строки, уже бывшие в файле, сохраняют позицию, новые дописываются в конец;
+#   fingerprint — сортировка по дайджесту (внутри каждого источника для 26.txt);
+#   upstream    — порядок как у источника (прежнее поведение).
+
+OUTPUT_ORDERS = ("stable", "fingerprint", "upstream")
+
+
+def _read_lines(path: str) -> list[str]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().splitlines()
+    except OSError:
+        return []
+
+
+def order_configs(lines: list[str], previous_path: str, mode: str) -> list[str]:
+    """Упорядочивает конфиги одного файла относительно его предыдущей версии."""
+    if mode == "upstream":
+        return lines
+    if mode == "fingerprint":
+        return sorted(lines, key=config_digest)
+
+    previous = _read_lines(previous_path)
+    if not previous:
+        return lines
+    remaining = Counter(lines)
+    result: list[str] = []
+    for line in previous:
+        if remaining[line] > 0:
+            result.append(line)
+            remaining[line] -= 1
+    for line in lines:
+        if remaining[line] > 0:
+            result.append(line)
+            remaining[line] -= 1
+    return result
+
+
+def _iter_file_lines(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line:
+                yield line
+
+
+def reorder_stable_file(new_path: str, previous_path: str, out_path: str):
+    """Потоковая версия режима stable для дедуплицированных файлов (26.txt):
+    держит в памяти только дайджесты, а не строки."""
+    new_digests = DigestSet(digest_size=16)
+    for line in _iter_file_lines(new_path):
+        new_digests.add(config_digest(line))
+
+    kept = DigestSet(digest_size=16)
+    written = 0
+    with open(out_path, "w", encoding="utf-8") as out:
+        if os.path.exists(previous_path):
+            for line in _iter_file_lines(previous_path):
+                digest = config_digest(line)
+                if digest in new_digests and kept.add(digest):
+                    out.write("\n" + line if written else line)
+                    written += 1
+        for line in _iter_file_lines(new_path):
+            if config_digest(line) not in kept:
+                out.write("\n" + line if written else line)
+                written += 1
+
+
+def same_content(path_a: str, path_b: str) -> bool:
+    """Побайтовое сравнение файлов без чтения их целиком в память."""
+    try:
+        return filecmp.cmp(path_a, path_b, shallow=False)
+    except OSError:
+        return False
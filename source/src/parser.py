@@ -3,6 +3,7 @@ import base64
 import urllib.parse
 import html
 import os
+import json
 from src.logger import log
 
 # -------------------- ФИЛЬТРАЦИЯ --------------------
@@ -36,8 +37,162 @@ def try_decode_base64(data: str) -> str:
     return data
 
 
-def filter_insecure_configs(local_path: str, data: str, log_enabled: bool = True) -> tuple[str, int]:
-    """Декодирует Base64, разделяет конфиги и фильтрует только валидные и безопасные."""
+# -------------------- СТРУКТУРНАЯ ВАЛИДАЦИЯ --------------------
+# Быстрые предкомпилированные проверки по протоколам: конфиги без хоста,
+# с портом вне диапазона, битым UUID или обрезанным vmess-JSON отбрасываются
+# до записи, дедупликации и всех последующих стадий.
+
+_UUID_RE = re.compile(r"^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}$")
+# scheme://[userinfo@]host:port[/?#...]; host — домен/IPv4 или IPv6 в скобках.
+# userinfo отделяется по последнему «@» (см. _split_authority): в SIP002 и SS-2022
+# он бывает стандартным base64 с «/», поэтому регулярки проверяют только host:port.
+_HOSTPORT_RE = re.compile(r"^(\[[0-9a-fA-F:.]+\]|[^:/?#@\[\]\s]+):(\d{1,5})(?:/|$)")
+# Hysteria2: порт необязателен (по умолчанию 443) или задан списком/диапазоном для port hopping
+_HY2_HOSTPORT_RE = re.compile(
+    r"^(\[[0-9a-fA-F:.]+\]|[^:/?#@\[\]\s]+)"
+    r"(?::(\d{1,5}(?:-\d{1,5})?(?:,\d{1,5}(?:-\d{1,5})?)*))?(?:/|$)"
+)
+_SSR_RE = re.compile(r"^([^:]+):(\d{1,5}):[^:]*:[^:]*:[^:]*:")
+
+
+def _b64decode_loose(payload: str) -> str:
+    payload = payload.strip().replace("-", "+").replace("_", "/")
+    rem = len(payload) % 4
+    if rem:
+        payload += "=" * (4 - rem)
+    return base64.b64decode(payload).decode("utf-8", errors="ignore")
+
+
+def _valid_port(port) -> bool:
+    try:
+        return 0 < int(port) <= 65535
+    except (TypeError, ValueError):
+        return False
+
+
+def _valid_user_id(value: str) -> bool:
+    # Xray принимает как UUID, так и произвольную строку до 30 байт (маппится в UUIDv5)
+    if _UUID_RE.match(value):
+        return True
+    return 0 < len(value.encode("utf-8")) <= 30 and not any(ch.isspace() for ch in value)
+
+
+def _split_authority(line: str) -> tuple[str | None, str] | None:
+    """Делит scheme://userinfo@host:port/path?query#frag на (userinfo, host:port/path).
+    None — если userinfo содержит пробельные символы."""
+    rest = line.partition("://")[2].split("#", 1)[0].split("?", 1)[0]
+    userinfo, sep, hostpart = rest.rpartition("@")
+    if not sep:
+        return None, rest
+    if any(ch.isspace() for ch in userinfo):
+        return None
+    return userinfo, hostpart
+
+
+def _check_authority(line: str, require_uuid: bool = False, require_userinfo: bool = False) -> str | None:
+    parts = _split_authority(line)
+    m = _HOSTPORT_RE.match(parts[1]) if parts else None
+    if not m:
+        return "host/port"
+    userinfo = parts[0]
+    if not _valid_port(m.group(2)):
+        return "port"
+    if require_uuid and not (userinfo and _valid_user_id(urllib.parse.unquote(userinfo))):
+        return "uuid"
+    if require_userinfo and not userinfo:
+        return "credentials"
+    return None
+
+
+def _check_hysteria2(line: str) -> str | None:
+    parts = _split_authority(line)
+    m = _HY2_HOSTPORT_RE.match(parts[1]) if parts else None
+    if not m:
+        return "host/port"
+    ports = m.group(2)
+    if ports:
+        for part in ports.split(","):
+            start, _, end = part.partition("-")
+            if not _valid_port(start) or (end and not (_valid_port(end) and int(start) <= int(end))):
+                return "port"
+    return None
+
+
+def _check_vmess(line: str) -> str | None:
+    try:
+        decoded = _b64decode_loose(line[8:].split("#", 1)[0])
+        j = json.loads(decoded)
+    except Exception:
+        return "vmess json"
+    if not isinstance(j, dict):
+        return "vmess json"
+    if not str(j.get("add") or "").strip():
+        return "host/port"
+    if not _valid_port(j.get("port")):
+        return "port"
+    if not _valid_user_id(str(j.get("id") or "")):
+        return "uuid"
+    return None
+
+
+def _check_ss(line: str) -> str | None:
+    body = line[5:].split("#", 1)[0]
+    if "@" in body:
+        # SIP002: ss://base64(method:password)@host:port или ss://method:password@host:port
+        return _check_authority(line.split("#", 1)[0], require_userinfo=True)
+    # Старый формат: ss://base64(method:password@host:port)
+    try:
+        decoded = _b64decode_loose(body.split("?", 1)[0].split("/", 1)[0])
+    except Exception:
+        return "base64"
+    return _check_authority("ss://" + decoded, require_userinfo=True)
+
+
+def _check_ssr(line: str) -> str | None:
+    try:
+        decoded = _b64decode_loose(line[6:].split("#", 1)[0])
+    except Exception:
+        return "base64"
+    m = _SSR_RE.match(decoded)
+    if not m or not m.group(1).strip():
+        return "host/port"
+    return None if _valid_port(m.group(2)) else "port"
+
+
+_VALIDATORS = {
+    "vmess": _check_vmess,
+    "vless": lambda line: _check_authority(line, require_uuid=True),
+    "trojan": lambda line: _check_authority(line, require_userinfo=True),
+    "ss": _check_ss,
+    "ssr": _check_ssr,
+    "tuic": lambda line: _check_authority(line, require_userinfo=True),
+    "hysteria": _check_authority,
+    "hysteria2": _check_hysteria2,
+    "hy2": _check_hysteria2,
+    "juicity": _check_authority,
+    "socks5": _check_authority,
+    "socks4": _check_authority,
+    "ssh": _check_authority,
+    "wireguard": _check_authority,
+    "snell": _check_authority,
+    # brook использует несколько несовместимых форматов ссылок — не проверяем
+}
+
+
+def validate_config(line: str) -> str | None:
+    """Проверяет структуру конфига. Возвращает причину отказа или None, если конфиг валиден."""
+    scheme, sep, _ = line.partition("://")
+    if not sep:
+        return "scheme"
+    validator = _VALIDATORS.get(scheme.lower())
+    return validator(line) if validator else None
+
+
+def filter_insecure_configs(
+    local_path: str, data: str, log_enabled: bool = True
+) -> tuple[str, int, dict[str, int]]:
+    """Декодирует Base64, разделяет конфиги и фильтрует только валидные и безопасные.
+    Возвращает (конфиги, число небезопасных, отброшенные невалидные по причинам)."""
     data = try_decode_base64(data)
     
     # Гарантируем, что протоколы начинаются с новой строки (если они склеены)
@@ -52,12 +207,18 @@ def filter_insecure_configs(local_path: str, data: str, log_enabled: bool = True
     
     result = []
     insecure_count = 0
+    invalid: dict[str, int] = {}
     splitted = data.splitlines()
     
     for line in splitted:
         line_stripped = line.strip()
         if not line_stripped.lower().startswith(PROTOCOL_PREFIXES):
             continue
+
+        reason = validate_config(line_stripped)
+        if reason is not None:
+            invalid[reason] = invalid.get(reason, 0) + 1
+            continue
             
         processed = urllib.parse.unquote(html.unescape(line_stripped))
         if not INSECURE_PATTERN.search(processed):
@@ -67,4 +228,13 @@ def filter_insecure_configs(local_path: str, data: str, log_enabled: bool = True
 
     if insecure_count > 0 and log_enabled:
         log(f"ℹ️ Отфильтровано {insecure_count} небезопасных конфигов для {os.path.basename(local_path)}")
-    return "\n".join(result), insecure_count
+    if invalid and log_enabled:
+        log(
+            f"ℹ️ Отброшено {sum(invalid.values())} невалидных конфигов для {os.path.basename(local_path)} "
+            f"({format_rejections(invalid)})"
+        )
+    return "\n".join(result), insecure_count, invalid
+
+
+def format_rejections(invalid: dict[str, int]) -> str:
+    return ", ".join(f"{reason}: {count}" for reason, count in sorted(invalid.items(), key=lambda kv: -kv[1]))
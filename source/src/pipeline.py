@@ -0,0 +1,187 @@
+import functools
+import itertools
+import tracemalloc
+from src.context import RunContext
+from src.file_manager import (
+    download_and_save,
+    build_sni_matcher,
+    iter_spooled,
+    load_extra_configs,
+    spool_aggregate_shard,
+    write_aggregate,
+)
+from src.release_fetcher import fetch_latest_release_links, fetch_vc_runtime_link
+from src.readme_updater import update_readme_download_links, update_readme_table
+from src.github_api import get_repo_stats
+from src.sources import Aggregate, Source
+from src.git_ops import git_commit_and_push
+from src.poll_scheduler import get_poll_scheduler
+from src.task_graph import TaskGraph
+from src.transport import get_transport
+
+# -------------------- ПРОГОН --------------------
+# Стадии прогона как граф задач. Всё состояние прогона передаётся через ctx,
+# поэтому несколько прогонов с разными output_dir/cache_dir могут идти в одном
+# процессе одновременно: история опроса и индекс вариантов ведутся по cache_dir,
+# а правка общего README.md и git-коммит в общем репозитории идут по очереди.
+
+
+def _download(ctx: RunContext, source: Source) -> bool:
+    result = download_and_save(source, ctx=ctx)
+    if result:
+        _, output = result
+        ctx.mark_updated(output)
+    return bool(result)
+
+
+def _write_aggregate(ctx: RunContext, aggregate: Aggregate, n_local: int, sni_regex, *results) -> str | None:
+    # Без списка SNI локальные шарды пусты: не перезаписываем агрегат одними доп. источниками
+    if aggregate.sni_filter and sni_regex is None:
+        ctx.log(f"⚠️ {aggregate.output} не пересобран: список SNI-доменов недоступен")
+        return None
+    local_shards = ((iter_spooled(path), 0) for path in results[:n_local])
+    extra_shards = ((data.splitlines(), count) for data, count in results[n_local:])
+    local_path, changed = write_aggregate(aggregate, itertools.chain(local_shards, extra_shards), ctx=ctx)
+    # Агрегат отмечается обновлённым только при реальном изменении содержимого
+    if changed:
+        ctx.mark_updated(aggregate.output)
+    return local_path
+
+
+def _save_poll_state(ctx: RunContext, total_sources: int, *_):
+    get_poll_scheduler().save()
+    skipped = int(ctx.metrics.get("poll_skipped"))
+    if skipped:
+        ctx.log(f"ℹ️ Адаптивный опрос: пропущено {skipped} из {total_sources} стабильных источников")
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), max(1, size)):
+        yield items[start:start + max(1, size)]
+
+
+def _add_extra_tasks(graph: TaskGraph, ctx: RunContext) -> dict[str, list[str]]:
+    """Задачи дополнительных источников агрегатов: {id агрегата: [имена задач]}."""
+    return {
+        aggregate.id: [
+            graph.add(f"extra:{aggregate.id}:{j}", functools.partial(load_extra_configs, url, aggregate, ctx=ctx))
+            for j, url in enumerate(aggregate.extra_urls, start=1)
+        ]
+        for aggregate in ctx.settings.aggregates
+    }
+
+
+def _add_aggregate_tasks(
+    graph: TaskGraph, ctx: RunContext, aggregate_extras: dict[str, list[str]], downloads: dict[str, str]
+) -> list[str]:
+    """Шарды и запись агрегатов; шард ждёт скачивания своей группы источников
+    (если они есть в downloads). Возвращает имена задач записи."""
+    settings = ctx.settings
+    writes: list[str] = []
+    for aggregate in settings.aggregates:
+        shards = [
+            graph.add(
+                f"shard:{aggregate.id}:{k}",
+                lambda sni_regex, *_, group=group, aggregate=aggregate: spool_aggregate_shard(
+                    aggregate, group, sni_regex
+                ),
+                deps=("sni_matcher", *(downloads[s.id] for s in group if s.id in downloads)),
+            )
+            for k, group in enumerate(_chunks(aggregate.select(settings.sources), settings.aggregate_shard_size), 1)
+        ]
+        writes.append(graph.add(
+            f"write:{aggregate.id}",
+            functools.partial(_write_aggregate, ctx, aggregate, len(shards)),
+            deps=("sni_matcher", *shards, *aggregate_extras[aggregate.id]),
+        ))
+    return writes
+
+
+def build_pipeline(ctx: RunContext, dry_run: bool = False) -> TaskGraph:
+    """Описывает прогон как граф задач: каждая стадия ждёт только свои входы."""
+    settings = ctx.settings
+    graph = TaskGraph()
+
+    # Стадии на критическом пути (источники и сборка агрегатов) добавляются первыми,
+    # чтобы раньше попасть в пул потоков.
+    graph.add("sni_matcher", build_sni_matcher)
+    aggregate_extras = _add_extra_tasks(graph, ctx)
+    extras = [name for names in aggregate_extras.values() for name in names]
+
+    downloads: dict[str, str] = {}
+    for source in settings.sources:
+        downloads[source.id] = graph.add(f"download:{source.id}", functools.partial(_download, ctx, source))
+
+    # Шард агрегата ждёт только свою группу источников, поэтому чтение первых групп
+    # идёт внахлёст со скачиванием остальных.
+    writes = _add_aggregate_tasks(graph, ctx, aggregate_extras, downloads)
+    graph.add(
+        "poll_state",
+        functools.partial(_save_poll_state, ctx, len(downloads) + len(extras)),
+        deps=(*downloads.values(), *extras),
+    )
+
+    # Не зависят от конфигов — стартуют сразу и идут внахлёст со скачиванием
+    graph.add("release_links", fetch_latest_release_links)
+    graph.add("vc_runtime", fetch_vc_runtime_link)
+    graph.add("repo_stats", get_repo_stats)
+
+    # Обновляем ссылки на скачивание v2rayNG, Throne и Visual C++ Runtimes
+    graph.add(
+        "readme_links",
+        lambda links, vc_runtime_link: update_readme_download_links(links, vc_runtime_link, ctx=ctx),
+        deps=("release_links", "vc_runtime"),
+    )
+    # README правится последовательно: таблица пишется после ссылок
+    graph.add(
+        "readme_table",
+        lambda repo_stats, *_: update_readme_table(repo_stats=repo_stats, ctx=ctx),
+        deps=("repo_stats", "readme_links", *writes, *downloads.values()),
+    )
+    graph.add(
+        "git",
+        lambda *_: git_commit_and_push(dry_run=dry_run, ctx=ctx),
+        deps=("readme_table", "poll_state"),
+    )
+    return graph
+
+
+def _start_memory_trace(ctx: RunContext) -> bool:
+    # Трассировка общая на процесс: включается один раз и не выключается, чтобы
+    # параллельные прогоны и write_aggregate только снимали с неё показания.
+    if not ctx.settings.trace_memory:
+        return False
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return True
+
+
+def run_pipeline(ctx: RunContext | None = None, dry_run: bool = False) -> RunContext:
+    """Выполняет один прогон в ctx (по умолчанию — новый контекст с глобальными
+    настройками) и возвращает его: логи, обновлённые файлы и метрики остаются в ctx."""
+    ctx = ctx or RunContext()
+    with ctx.activate():
+        tracing = _start_memory_trace(ctx)
+        try:
+            build_pipeline(ctx, dry_run=dry_run).run(max_workers=ctx.settings.max_workers + 4)
+        finally:
+            ctx.log(ctx.transport_stats.summary(get_transport().name))
+            if tracing:
+                ctx.log(f"📈 Пиковая память процесса: {tracemalloc.get_traced_memory()[1] / 1024 / 1024:.1f} МБ")
+    return ctx
+
+
+def run_aggregates(ctx: RunContext | None = None) -> RunContext:
+    """Пересобирает только агрегаты из уже скачанных файлов теми же задачами, что и
+    run_pipeline (шарды во временных файлах + write_aggregate), без скачивания
+    источников, README и git. Дополнительные источники агрегатов при этом качаются."""
+    ctx = ctx or RunContext()
+    with ctx.activate():
+        graph = TaskGraph()
+        graph.add("sni_matcher", build_sni_matcher)
+        aggregate_extras = _add_extra_tasks(graph, ctx)
+        extras = [name for names in aggregate_extras.values() for name in names]
+        _add_aggregate_tasks(graph, ctx, aggregate_extras, downloads={})
+        graph.add("poll_state", functools.partial(_save_poll_state, ctx, len(extras)), deps=extras)
+        graph.run(max_workers=ctx.settings.max_workers)
+    return ctx
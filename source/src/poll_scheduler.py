@@ -0,0 +1,103 @@
+import json
+import os
+import threading
+import time
+from src.config import get_settings
+
+# -------------------- АДАПТИВНЫЙ ОПРОС ИСТОЧНИКОВ --------------------
+# Для каждого URL хранится история изменений. Источник, изменившийся при
+# последней проверке, опрашивается каждый запуск; стабильный — всё реже
+# (интервал удваивается), но не реже, чем раз в poll_max_staleness секунд.
+
+
+class PollScheduler:
+    def __init__(self, path: str, enabled: bool, base_interval: int, max_staleness: int):
+        self.path = path
+        self.enabled = enabled
+        self.base_interval = base_interval
+        self.max_staleness = max_staleness
+        self._state: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._state = data
+        except Exception:
+            self._state = {}
+
+    def save(self):
+        with self._lock:
+            data = json.dumps(self._state, ensure_ascii=False, sort_keys=True)
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            pass
+
+    def next_interval(self, url: str) -> int:
+        """Текущий интервал опроса источника в секундах."""
+        with self._lock:
+            streak = int(self._state.get(url, {}).get("unchanged_streak", 0))
+        if streak <= 0:
+            return 0
+        return min(self.max_staleness, self.base_interval * (2 ** (streak - 1)))
+
+    def is_due(self, url: str, now: float | None = None, adaptive: bool = True) -> bool:
+        """Нужно ли опрашивать источник в этом запуске. adaptive=False — источник
+        отказался от адаптивного опроса ("adaptive_polling": false) и опрашивается всегда."""
+        if not self.enabled or not adaptive:
+            return True
+        with self._lock:
+            last_checked = float(self._state.get(url, {}).get("last_checked", 0))
+        # Небольшой запас, чтобы запуск по cron чуть раньше срока не сдвигал опрос на целый период
+        return (now or time.time()) - last_checked + 30 >= self.next_interval(url)
+
+    def record(self, url: str, changed: bool | None, digest: str | None = None, now: float | None = None):
+        """Фиксирует результат опроса. changed=None — ошибка, источник будет проверен в следующий раз."""
+        now = now or time.time()
+        with self._lock:
+            entry = self._state.setdefault(url, {})
+            entry["last_checked"] = now
+            if changed is None:
+                entry["unchanged_streak"] = 0
+                return
+            if changed:
+                entry["last_changed"] = now
+                entry["unchanged_streak"] = 0
+            else:
+                entry["unchanged_streak"] = int(entry.get("unchanged_streak", 0)) + 1
+            if digest is not None:
+                entry["digest"] = digest
+
+    def digest(self, url: str) -> str | None:
+        with self._lock:
+            return self._state.get(url, {}).get("digest")
+
+
+_SCHEDULERS: dict[str, PollScheduler] = {}
+_SCHEDULERS_LOCK = threading.Lock()
+
+
+def get_poll_scheduler() -> PollScheduler:
+    """Планировщик для cache_dir текущих настроек; загружается с диска при первом обращении.
+    Прогоны с разными cache_dir ведут раздельную историю опроса."""
+    settings = get_settings()
+    path = os.path.abspath(os.path.join(settings.cache_dir, "poll_state.json"))
+    with _SCHEDULERS_LOCK:
+        scheduler = _SCHEDULERS.get(path)
+        if scheduler is None:
+            scheduler = PollScheduler(
+                path=path,
+                enabled=settings.adaptive_polling,
+                base_interval=settings.poll_base_interval,
+                max_staleness=settings.poll_max_staleness,
+            )
+            scheduler.load()
+            _SCHEDULERS[path] = scheduler
+        return scheduler
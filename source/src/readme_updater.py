@@ -1,11 +1,13 @@
 import os
 import re
-from src.config import README_PATH, URLS, REPO_NAME
-from src.logger import log, offset, updated_files
+from src.context import RunContext, path_lock, with_context
+from src.logger import log
 from src.file_manager import extract_source_name
 from src.github_api import get_repo_stats, build_repo_stats_table
 
 # -------------------- README --------------------
+_TABLE_ROW_RE = re.compile(r"^\|\s*\d+\s*\|\s*\[`([^`]+)`\][^|\n]*\|[^\n]*?\|\s*([^|\n]*?)\s*\|\s*([^|\n]*?)\s*\|\s*$", re.M)
+
 
 def _insert_repo_stats_section(content: str, stats_section: str) -> str:
     pattern = r"(\| № \| Файл \| Источник \| Время \| Дата \|[\s\S]*?\|--\|--\|--\|--\|--\|[\s\S]*?\n)(?=\n## )"
@@ -15,18 +17,25 @@ def _insert_repo_stats_section(content: str, stats_section: str) -> str:
     return re.sub(pattern, lambda m: m.group(1) + "\n" + stats_section, content, count=1)
 
 
-def update_readme_download_links(links: dict[str, str], vc_runtime_link: str | None = None):
+@with_context
+def update_readme_download_links(links: dict[str, str], vc_runtime_link: str | None = None, *, ctx: RunContext):
     """Обновляет ссылки на скачивание v2rayNG, Throne и Visual C++ Runtimes в README.md."""
+    with path_lock(ctx.settings.readme_path):
+        _update_readme_download_links(links, vc_runtime_link, ctx)
+
+
+def _update_readme_download_links(links: dict[str, str], vc_runtime_link: str | None, ctx: RunContext):
+    readme_path = ctx.settings.readme_path
     if not links and not vc_runtime_link:
         log("⚠️ Нет новых ссылок для обновления в README.md")
         return
 
-    if not os.path.exists(README_PATH):
+    if not os.path.exists(readme_path):
         log("❌ README.md не найден")
         return
 
     try:
-        with open(README_PATH, "r", encoding="utf-8") as f:
+        with open(readme_path, "r", encoding="utf-8") as f:
             content = f.read()
     except Exception as e:
         log(f"⚠️ Ошибка при чтении README.md: {e}")
@@ -81,7 +90,7 @@ def update_readme_download_links(links: dict[str, str], vc_runtime_link: str | N
 
     if content != original_content:
         try:
-            with open(README_PATH, "w", encoding="utf-8") as f:
+            with open(readme_path, "w", encoding="utf-8") as f:
                 f.write(content)
             log("📝 Ссылки на скачивание в README.md обновлены")
         except Exception as e:
@@ -90,48 +99,47 @@ def update_readme_download_links(links: dict[str, str], vc_runtime_link: str | N
         log("ℹ️ Ссылки на скачивание не требуют изменений")
 
 
-def update_readme_table(repo_stats: dict | None = None):
+@with_context
+def update_readme_table(repo_stats: dict | None = None, *, ctx: RunContext):
     """Обновляет таблицы в README.md локально."""
-    if not os.path.exists(README_PATH):
+    with path_lock(ctx.settings.readme_path):
+        _update_readme_table(repo_stats, ctx)
+
+
+def _update_readme_table(repo_stats: dict | None, ctx: RunContext):
+    settings = ctx.settings
+    readme_path = settings.readme_path
+    if not os.path.exists(readme_path):
         log("❌ README.md не найден")
         return
     try:
-        with open(README_PATH, "r", encoding="utf-8") as f:
+        with open(readme_path, "r", encoding="utf-8") as f:
             old_content = f.read()
     except Exception as e:
         log(f"⚠️ Ошибка при чтении README.md: {e}")
         return
 
-    time_part, date_part = offset.split(" | ")
+    time_part, date_part = ctx.offset().split(" | ")
 
     table_header = "| № | Файл | Источник | Время | Дата |\n|--|--|--|--|--|"
     table_rows: list[str] = []
-
-    all_urls_with_26 = URLS + [""]  # 26-й файл без внешнего URL
-    for i, url in enumerate(all_urls_with_26, start=1):
-        filename = f"{i}.txt"
-        raw_file_url = f"https://github.com/{REPO_NAME}/raw/refs/heads/main/githubmirror/{i}.txt"
-
-        if i <= 25:
-            source_name = extract_source_name(url)
-            source_column = f"[{source_name}]({url})"
-        else:
-            source_name = "Обход SNI/CIDR белых списков"
-            source_column = f"[{source_name}]({raw_file_url})"
-
-        if i in updated_files:
+    # Прежние даты обновления разбираются одним проходом, а не поиском по README для каждой строки
+    previous = {
+        m.group(1): (m.group(2).strip() or "Никогда", m.group(3).strip() or "Никогда")
+        for m in _TABLE_ROW_RE.finditer(old_content)
+    }
+    raw_base = f"https://github.com/{settings.repo_name}/raw/refs/heads/main/githubmirror"
+
+    rows = [(s.output, f"[{extract_source_name(s.url)}]({s.url})") for s in settings.sources]
+    rows += [(a.output, f"[{a.title}]({raw_base}/{a.output})") for a in settings.aggregates]
+    for i, (filename, source_column) in enumerate(rows, start=1):
+        if ctx.is_updated(filename):
             update_time, update_date = time_part, date_part
         else:
-            pattern = rf"\|\s*{i}\s*\|\s*\[`{filename}`\].*?\|.*?\|\s*(.*?)\s*\|\s*(.*?)\s*\|"
-            match = re.search(pattern, old_content)
-            if match:
-                update_time = match.group(1).strip() or "Никогда"
-                update_date = match.group(2).strip() or "Никогда"
-            else:
-                update_time = update_date = "Никогда"
+            update_time, update_date = previous.get(filename, ("Никогда", "Никогда"))
 
         table_rows.append(
-            f"| {i} | [`{filename}`]({raw_file_url}) | {source_column} | {update_time} | {update_date} |"
+            f"| {i} | [`{filename}`]({raw_base}/{filename}) | {source_column} | {update_time} | {update_date} |"
         )
 
     new_table = table_header + "\n" + "\n".join(table_rows)
@@ -156,7 +164,7 @@ def update_readme_table(repo_stats: dict | None = None):
         return
 
     try:
-        with open(README_PATH, "w", encoding="utf-8") as f:
+        with open(readme_path, "w", encoding="utf-8") as f:
             f.write(new_content)
         log("📝 README.md обновлён")
     except Exception as e:
@@ -0,0 +1,217 @@
+import gzip
+import hashlib
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable
+from src.artifacts import ARTIFACT_VARIANTS
+from src.config import get_settings
+from src.logger import log
+
+# -------------------- РЕЖИМ СЕРВИСА --------------------
+# Процесс остаётся запущенным: пайплайн обновляет источники по расписанию
+# с тёплой HTTP-сессией, а актуальные выходные файлы и их варианты (N.txt.b64,
+# N.txt.gz, N.txt.zst; в git их нет) раздаются из памяти по HTTP.
+
+_VARIANT_SUFFIXES = tuple(f".txt.{v}" for v in ARTIFACT_VARIANTS)
+_FILE_NAME_RE = re.compile(
+    r"^/(?:githubmirror/)?([\w.-]+\.txt(?:\.(?:" + "|".join(map(re.escape, ARTIFACT_VARIANTS)) + r"))?)$"
+)
+# Уже сжатые варианты отдаются как есть, без Content-Encoding
+_CONTENT_TYPES = {"gz": "application/gzip", "zst": "application/zstd"}
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class _Entry:
+    __slots__ = ("body", "gzip_body", "content_type", "etag", "last_modified")
+
+    def __init__(self, body: bytes, last_modified: float, content_type: str | None = None):
+        digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.body = body
+        self.content_type = content_type or "text/plain; charset=utf-8"
+        self.gzip_body = gzip.compress(body, compresslevel=6, mtime=0) if content_type is None else None
+        self.etag = f'"{digest}"'
+        self.last_modified = last_modified
+
+
+class SubscriptionStore:
+    """Потокобезопасное хранилище содержимого выходных файлов в памяти."""
+
+    def __init__(self):
+        self._entries: dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> _Entry | None:
+        with self._lock:
+            return self._entries.get(name)
+
+    def reload(self, mirror_dir: str) -> int:
+        """Перечитывает *.txt и их варианты из папки. Возвращает число изменившихся файлов."""
+        changed = 0
+        try:
+            names = [n for n in os.listdir(mirror_dir) if n.endswith((".txt", *_VARIANT_SUFFIXES))]
+        except OSError as e:
+            log(f"⚠️ Сервис: не удалось прочитать {mirror_dir}: {e}")
+            return 0
+        for name in names:
+            try:
+                with open(os.path.join(mirror_dir, name), "rb") as f:
+                    body = f.read()
+            except OSError:
+                continue
+            current = self.get(name)
+            if current is not None and current.body == body:
+                continue
+            entry = _Entry(body, time.time(), _CONTENT_TYPES.get(name.rsplit(".", 1)[-1]))
+            with self._lock:
+                self._entries[name] = entry
+            changed += 1
+        return changed
+
+
+def _parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Разбирает одиночный диапазон 'bytes=a-b'. None — диапазон невалиден."""
+    m = _RANGE_RE.match(header.strip())
+    if not m or (not m.group(1) and not m.group(2)):
+        return None
+    start_s, end_s = m.groups()
+    if not start_s:
+        length = int(end_s)
+        if length == 0:
+            return None
+        return max(0, size - length), size - 1
+    start = int(start_s)
+    end = int(end_s) if end_s else size - 1
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def _make_handler(store: SubscriptionStore):
+    class SubscriptionHandler(BaseHTTPRequestHandler):
+        server_version = "goida-vpn-configs"
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass  # журнал запросов не нужен: логи пайплайна и так объёмные
+
+        def do_HEAD(self):
+            self._serve(send_body=False)
+
+        def do_GET(self):
+            self._serve(send_body=True)
+
+        def _send_empty(self, status: int, headers: dict[str, str] | None = None):
+            self.send_response(status)
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def _serve(self, send_body: bool):
+            path = self.path.split("?", 1)[0]
+            if path == "/healthz":
+                body = b"ok"
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if send_body:
+                    self.wfile.write(body)
+                return
+
+            m = _FILE_NAME_RE.match(path)
+            entry = store.get(m.group(1)) if m else None
+            if entry is None:
+                self._send_empty(404)
+                return
+
+            use_gzip = entry.gzip_body is not None and "gzip" in self.headers.get("Accept-Encoding", "").lower()
+            range_header = self.headers.get("Range")
+            # Range обслуживаем только для несжатого представления
+            if range_header:
+                use_gzip = False
+            etag = entry.etag[:-1] + '-gz"' if use_gzip else entry.etag
+
+            common = {
+                "Content-Type": entry.content_type,
+                "ETag": etag,
+                "Cache-Control": "public, max-age=60",
+                "Vary": "Accept-Encoding",
+                "Accept-Ranges": "bytes",
+                "Last-Modified": self.date_time_string(int(entry.last_modified)),
+            }
+
+            if_none_match = self.headers.get("If-None-Match")
+            if if_none_match and (if_none_match.strip() == "*" or etag in if_none_match):
+                self._send_empty(304, common)
+                return
+
+            body = entry.gzip_body if use_gzip else entry.body
+            status = 200
+            if range_header and "," not in range_header:
+                if_range = self.headers.get("If-Range")
+                if not if_range or if_range.strip() == entry.etag:
+                    byte_range = _parse_range(range_header, len(body))
+                    if byte_range is None:
+                        self._send_empty(416, {"Content-Range": f"bytes */{len(body)}"})
+                        return
+                    start, end = byte_range
+                    common["Content-Range"] = f"bytes {start}-{end}/{len(body)}"
+                    body = body[start:end + 1]
+                    status = 206
+
+            self.send_response(status)
+            for key, value in common.items():
+                self.send_header(key, value)
+            if use_gzip:
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+
+    return SubscriptionHandler
+
+
+def serve(run_pipeline: Callable[[], None], host: str, port: int, interval: int):
+    """Запускает HTTP-сервер и фоновое обновление пайплайна каждые interval секунд."""
+    mirror_dir = get_settings().githubmirror_dir
+    store = SubscriptionStore()
+    store.reload(mirror_dir)
+
+    stop = threading.Event()
+
+    def _refresh_loop():
+        while not stop.is_set():
+            started = time.monotonic()
+            try:
+                run_pipeline()
+            except Exception as e:
+                print(f"❌ Сервис: ошибка обновления: {e}", flush=True)
+            changed = store.reload(mirror_dir)
+            print(
+                f"ℹ️ Сервис: обновление заняло {time.monotonic() - started:.1f} с, "
+                f"изменено файлов: {changed}",
+                flush=True,
+            )
+            stop.wait(max(0.0, interval - (time.monotonic() - started)))
+
+    httpd = ThreadingHTTPServer((host, port), _make_handler(store))
+    httpd.daemon_threads = True
+    refresher = threading.Thread(target=_refresh_loop, name="pipeline-refresh", daemon=True)
+    refresher.start()
+    print(
+        f"🌐 Подписки доступны на http://{host}:{port}/<имя>.txt и <имя>.txt.b64/.gz/.zst "
+        f"(обновление каждые {interval} с)",
+        flush=True,
+    )
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        httpd.server_close()
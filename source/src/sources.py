@@ -0,0 +1,159 @@
+import json
+import os
+import re
+
+# -------------------- ИСТОЧНИКИ И АГРЕГАТЫ --------------------
+# config/sources.json — по одному выходному файлу на источник:
+#   {"id": "1", "url": "https://…", "output": "1.txt", "enabled": true, "timeout": 10,
+#    "adaptive_polling": false}
+# config/outputs.json — агрегаты, собираемые из уже скачанных источников:
+#   {"id": "sni", "output": "26.txt", "title": "…", "sources": "*",
+#    "sni_filter": true, "extra_urls": "26_urls.json", "adaptive_polling": false}
+# "adaptive_polling": false — источник (у агрегата — его extra_urls) опрашивается
+# каждый запуск, без адаптивного интервала (см. src.poll_scheduler).
+# Имена выходных файлов проверяются на уникальность, поэтому новый источник
+# не может молча перезаписать агрегат.
+
+_OUTPUT_NAME_RE = re.compile(r"^[\w.-]+\.txt$")
+
+
+class Source:
+    __slots__ = ("id", "url", "output", "enabled", "timeout", "adaptive_polling")
+
+    def __init__(
+        self,
+        id: str,
+        url: str,
+        output: str,
+        enabled: bool = True,
+        timeout: int | None = None,
+        adaptive_polling: bool = True,
+    ):
+        self.id = id
+        self.url = url
+        self.output = output
+        self.enabled = enabled
+        self.timeout = timeout
+        self.adaptive_polling = adaptive_polling
+
+    def __repr__(self) -> str:
+        return f"Source({self.id!r}, {self.output!r})"
+
+
+class Aggregate:
+    __slots__ = ("id", "output", "title", "source_ids", "sni_filter", "extra_urls", "adaptive_polling")
+
+    def __init__(
+        self,
+        id: str,
+        output: str,
+        title: str,
+        source_ids: list[str] | None = None,
+        sni_filter: bool = True,
+        extra_urls: list[str] | None = None,
+        adaptive_polling: bool = True,
+    ):
+        self.id = id
+        self.output = output
+        self.title = title
+        self.source_ids = source_ids  # None — все включённые источники
+        self.sni_filter = sni_filter
+        self.extra_urls = extra_urls or []
+        self.adaptive_polling = adaptive_polling
+
+    def select(self, sources: list[Source]) -> list[Source]:
+        """Входные источники агрегата в порядке sources.json."""
+        if self.source_ids is None:
+            return list(sources)
+        wanted = set(self.source_ids)
+        return [s for s in sources if s.id in wanted]
+
+    def __repr__(self) -> str:
+        return f"Aggregate({self.id!r}, {self.output!r})"
+
+
+def _read_json(path: str, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def _check_output(name, where: str) -> str:
+    if not isinstance(name, str) or not _OUTPUT_NAME_RE.match(name):
+        raise ValueError(f"{where}: некорректное имя выходного файла {name!r} (ожидается <имя>.txt)")
+    return name
+
+
+def load_sources(path: str) -> list[Source]:
+    """Читает sources.json. Поддерживает и старый формат urls.json
+    ({"1": "https://…"} или список URL): id — номер, output — <номер>.txt."""
+    data = _read_json(path, [])
+    if isinstance(data, dict):
+        data = [{"id": k, "url": data[k]} for k in sorted(data, key=int)]
+
+    sources: list[Source] = []
+    seen_ids: set[str] = set()
+    for n, item in enumerate(data, start=1):
+        if isinstance(item, str):
+            item = {"url": item}
+        where = f"{os.path.basename(path)}[{n}]"
+        if not isinstance(item, dict) or not item.get("url"):
+            raise ValueError(f"{where}: у источника нет url")
+        source_id = str(item.get("id", n))
+        if source_id in seen_ids:
+            raise ValueError(f"{where}: повторяющийся id {source_id!r}")
+        seen_ids.add(source_id)
+        timeout = item.get("timeout")
+        sources.append(Source(
+            id=source_id,
+            url=item["url"],
+            output=_check_output(item.get("output", f"{source_id}.txt"), where),
+            enabled=bool(item.get("enabled", True)),
+            timeout=int(timeout) if timeout is not None else None,
+            adaptive_polling=bool(item.get("adaptive_polling", True)),
+        ))
+    return sources
+
+
+def load_aggregates(path: str, sources: list[Source]) -> list[Aggregate]:
+    """Читает outputs.json и проверяет, что имена файлов не пересекаются с источниками.
+    extra_urls — список URL или имя JSON-файла рядом с outputs.json."""
+    base_dir = os.path.dirname(path)
+    source_ids = {s.id for s in sources}
+    taken = {s.output: f"источник {s.id}" for s in sources}
+
+    aggregates: list[Aggregate] = []
+    for n, item in enumerate(_read_json(path, []), start=1):
+        where = f"{os.path.basename(path)}[{n}]"
+        if not isinstance(item, dict) or not item.get("id"):
+            raise ValueError(f"{where}: у агрегата нет id")
+        output = _check_output(item.get("output"), where)
+        if output in taken:
+            raise ValueError(f"{where}: {output} уже занят ({taken[output]})")
+        taken[output] = f"агрегат {item['id']}"
+
+        selected = item.get("sources", "*")
+        if selected == "*":
+            selected = None
+        else:
+            selected = [str(s) for s in selected]
+            unknown = [s for s in selected if s not in source_ids]
+            if unknown:
+                raise ValueError(f"{where}: неизвестные источники {', '.join(unknown)}")
+
+        extra_urls = item.get("extra_urls") or []
+        if isinstance(extra_urls, str):
+            extra_urls = _read_json(os.path.join(base_dir, extra_urls), [])
+
+        aggregates.append(Aggregate(
+            id=str(item["id"]),
+            output=output,
+            title=item.get("title") or output,
+            source_ids=selected,
+            sni_filter=bool(item.get("sni_filter", True)),
+            extra_urls=list(extra_urls),
+            adaptive_polling=bool(item.get("adaptive_polling", True)),
+        ))
+    return aggregates
@@ -0,0 +1,93 @@
+import concurrent.futures
+import contextvars
+import threading
+import time
+from typing import Any, Callable
+from src.logger import log
+
+# -------------------- ГРАФ ЗАДАЧ --------------------
+# Каждая стадия объявляет свои входы; задача стартует сразу, как только готовы
+# все её зависимости, поэтому независимая работа (скачивание, шарды 26.txt,
+# релизы, статистика) выполняется внахлёст, а не барьерами.
+
+
+class TaskGraph:
+    def __init__(self):
+        self._tasks: dict[str, tuple[Callable[..., Any], tuple[str, ...]]] = {}
+        self.timings: dict[str, tuple[float, float]] = {}
+
+    def add(self, name: str, fn: Callable[..., Any], deps: tuple[str, ...] | list[str] = ()) -> str:
+        """Добавляет задачу. fn вызывается с результатами deps (в том же порядке).
+        Зависимости должны быть добавлены раньше — так граф гарантированно ацикличен."""
+        if name in self._tasks:
+            raise ValueError(f"Задача {name} уже добавлена")
+        missing = [d for d in deps if d not in self._tasks]
+        if missing:
+            raise ValueError(f"Задача {name}: неизвестные зависимости {', '.join(missing)}")
+        self._tasks[name] = (fn, tuple(deps))
+        return name
+
+    def run(self, max_workers: int) -> dict[str, Any]:
+        """Выполняет граф. Если задача падает, зависящие от неё пропускаются,
+        а первое исключение пробрасывается после завершения остальных задач."""
+        results: dict[str, Any] = {}
+        errors: dict[str, BaseException] = {}
+        remaining = {name: len(deps) for name, (_, deps) in self._tasks.items()}
+        dependents: dict[str, list[str]] = {name: [] for name in self._tasks}
+        for name, (_, deps) in self._tasks.items():
+            for dep in deps:
+                dependents[dep].append(name)
+
+        timings_lock = threading.Lock()
+
+        def _timed(name: str, fn: Callable[..., Any], args: list[Any]) -> Any:
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                with timings_lock:
+                    self.timings[name] = (started, time.perf_counter())
+
+        graph_started = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures: dict[concurrent.futures.Future, str] = {}
+
+            def _submit(name: str):
+                fn, deps = self._tasks[name]
+                # Каждая задача выполняется в копии контекста вызывающего потока (RunContext, настройки)
+                future = pool.submit(contextvars.copy_context().run, _timed, name, fn, [results[d] for d in deps])
+                futures[future] = name
+
+            def _skip(name: str):
+                for dependent in dependents[name]:
+                    if dependent not in errors:
+                        errors[dependent] = errors[name]
+                        _skip(dependent)
+
+            for name, count in remaining.items():
+                if count == 0:
+                    _submit(name)
+
+            while futures:
+                done, _ = concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    name = futures.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        log(f"❌ Задача {name} завершилась с ошибкой: {e}")
+                        errors[name] = e
+                        _skip(name)
+                        continue
+                    for dependent in dependents[name]:
+                        remaining[dependent] -= 1
+                        if remaining[dependent] == 0 and dependent not in errors:
+                            _submit(dependent)
+
+        wall = time.perf_counter() - graph_started
+        busy = sum(end - start for start, end in self.timings.values())
+        log(f"⏱️ Граф задач: {wall:.1f} с по времени, {busy:.1f} с суммарно по стадиям")
+
+        if errors:
+            raise next(iter(errors.values()))
+        return results
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING
+from src.config import get_settings
+from src.context import current_context
+
+if TYPE_CHECKING:
+    import requests
+
+# -------------------- ТРАНСПОРТ ДЛЯ fetch_data --------------------
+# Большинство источников живёт на raw.githubusercontent.com / github.com.
+# httpx с HTTP/2 мультиплексирует запросы к одному хосту в одном соединении;
+# если httpx/h2 не установлены, используется пуловая сессия requests.
+# В обоих случаях объявляются br/zstd, если установлены соответствующие декодеры
+# (для requests это делает сам urllib3).
+
+
+class TransportResponse:
+    __slots__ = ("text", "wire_bytes", "decoded_bytes", "http_version")
+
+    def __init__(self, text: str, wire_bytes: int, decoded_bytes: int, http_version: str):
+        self.text = text
+        self.wire_bytes = wire_bytes
+        self.decoded_bytes = decoded_bytes
+        self.http_version = http_version
+
+
+class TransportStats:
+    """Счётчики для отчёта о прогоне: трафик, версии HTTP, установка соединений.
+    Экземпляр принадлежит RunContext (ctx.transport_stats)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.wire_bytes = 0
+            self.decoded_bytes = 0
+            self.http_versions: dict[str, int] = {}
+            self.new_connections = 0
+            self.connect_seconds = 0.0
+
+    def record_response(self, response: TransportResponse):
+        with self._lock:
+            self.requests += 1
+            self.wire_bytes += response.wire_bytes
+            self.decoded_bytes += response.decoded_bytes
+            self.http_versions[response.http_version] = self.http_versions.get(response.http_version, 0) + 1
+
+    def record_connect(self, seconds: float):
+        with self._lock:
+            self.new_connections += 1
+            self.connect_seconds += seconds
+
+    def summary(self, transport_name: str) -> str:
+        with self._lock:
+            if not self.requests:
+                return f"📶 Транспорт {transport_name}: запросов не было"
+            versions = ", ".join(f"{v}: {n}" for v, n in sorted(self.http_versions.items()))
+            ratio = self.decoded_bytes / self.wire_bytes if self.wire_bytes else 0.0
+            line = (
+                f"📶 Транспорт {transport_name}: {self.requests} запросов ({versions}), "
+                f"{self.wire_bytes / 1024 / 1024:.1f} МБ по сети / "
+                f"{self.decoded_bytes / 1024 / 1024:.1f} МБ после распаковки (x{ratio:.1f})"
+            )
+            if self.new_connections:
+                line += (
+                    f", новых соединений {self.new_connections}, "
+                    f"установка соединений {self.connect_seconds:.2f} с"
+                )
+            return line
+
+
+def accept_encoding() -> str:
+    """Accept-Encoding для httpx с учётом установленных декодеров (br — brotli, zstd — zstandard)."""
+    encodings = ["gzip", "deflate"]
+    try:
+        import brotli  # noqa: F401
+        encodings.append("br")
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            encodings.append("br")
+        except ImportError:
+            pass
+    try:
+        import zstandard  # noqa: F401
+        encodings.append("zstd")
+    except ImportError:
+        pass
+    return ", ".join(encodings)
+
+
+class RequestsTransport:
+    name = "requests (HTTP/1.1)"
+
+    def __init__(self, session: requests.Session):
+        self.session = session
+
+    def get(self, url: str, timeout: int, verify: bool) -> TransportResponse:
+        response = self.session.get(url, timeout=timeout, verify=verify)
+        response.raise_for_status()
+        content = response.content
+        try:
+            # Для urllib3 tell() — число байт, фактически прочитанных из сокета (до распаковки)
+            wire_bytes = int(response.raw.tell()) or len(content)
+        except Exception:
+            wire_bytes = len(content)
+        result = TransportResponse(response.text, wire_bytes, len(content), "HTTP/1.1")
+        current_context().transport_stats.record_response(result)
+        return result
+
+
+def _as_requests_error(exc: Exception) -> Exception:
+    """Приводит исключения httpx к иерархии requests, чтобы fallback и
+    _format_fetch_error работали одинаково для обоих транспортов."""
+    import httpx
+    import requests
+
+    if isinstance(exc, httpx.HTTPStatusError):
+        fake = requests.Response()
+        fake.status_code = exc.response.status_code
+        fake.url = str(exc.request.url)
+        return requests.exceptions.HTTPError(str(exc), response=fake)
+    if isinstance(exc, httpx.ConnectTimeout):
+        return requests.exceptions.ConnectTimeout(str(exc))
+    if isinstance(exc, httpx.ReadTimeout):
+        return requests.exceptions.ReadTimeout(str(exc))
+    if isinstance(exc, httpx.TimeoutException):
+        return requests.exceptions.Timeout(str(exc))
+    if isinstance(exc, httpx.ConnectError) and "certificate" in str(exc).lower():
+        return requests.exceptions.SSLError(str(exc))
+    if isinstance(exc, (httpx.ConnectError, httpx.RemoteProtocolError, httpx.ReadError)):
+        return requests.exceptions.ConnectionError(str(exc))
+    return requests.exceptions.RequestException(str(exc))
+
+
+# Как Retry(total=1, status_forcelist=...) у сессии requests: один повтор на 429/5xx
+_RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+_RETRY_BACKOFF = 0.2
+_RETRY_AFTER_MAX = 5.0
+
+
+def _retry_delay(response) -> float:
+    try:
+        return min(max(float(response.headers.get("Retry-After", "")), 0.0), _RETRY_AFTER_MAX)
+    except ValueError:
+        return _RETRY_BACKOFF
+
+
+class HttpxTransport:
+    name = "httpx (HTTP/2)"
+
+    def __init__(self, max_connections: int, user_agent: str):
+        import httpx
+
+        # verify задаётся на уровне транспорта, поэтому для fallback без проверки TLS — отдельный клиент
+        self._clients = {
+            verify: httpx.Client(
+                transport=httpx.HTTPTransport(
+                    http2=True,
+                    verify=verify,
+                    retries=1,
+                    limits=httpx.Limits(
+                        max_connections=max_connections,
+                        max_keepalive_connections=max_connections,
+                    ),
+                ),
+                follow_redirects=True,
+                headers={"User-Agent": user_agent, "Accept-Encoding": accept_encoding()},
+            )
+            for verify in (True, False)
+        }
+
+    def _trace(self, url: str):
+        # Новое соединение: от connect_tcp.started до конца TLS-рукопожатия (для http:// — до TCP)
+        done_event = "connection.start_tls.complete" if url.startswith("https://") else "connection.connect_tcp.complete"
+        stats = current_context().transport_stats
+        started: dict[str, float] = {}
+
+        def _on_event(event_name: str, info: dict):
+            if event_name == "connection.connect_tcp.started":
+                started["t"] = time.perf_counter()
+            elif event_name == done_event and "t" in started:
+                stats.record_connect(time.perf_counter() - started.pop("t"))
+
+        return _on_event
+
+    def get(self, url: str, timeout: int, verify: bool) -> TransportResponse:
+        import httpx
+
+        client = self._clients[verify]
+        try:
+            # retries=1 у HTTPTransport повторяет только ошибки соединения, статусы — здесь
+            response = client.get(url, timeout=timeout, extensions={"trace": self._trace(url)})
+            if response.status_code in _RETRY_STATUSES:
+                time.sleep(_retry_delay(response))
+                response = client.get(url, timeout=timeout, extensions={"trace": self._trace(url)})
+            response.raise_for_status()
+        except httpx.HTTPError as exc:
+            raise _as_requests_error(exc) from exc
+        content = response.content
+        result = TransportResponse(
+            response.text,
+            response.num_bytes_downloaded or len(content),
+            len(content),
+            response.http_version,
+        )
+        current_context().transport_stats.record_response(result)
+        return result
+
+
+def _httpx_available() -> bool:
+    try:
+        import httpx  # noqa: F401
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+_TRANSPORTS: dict[tuple[str, int], RequestsTransport | HttpxTransport] = {}
+_TRANSPORTS_LOCK = threading.Lock()
+
+
+def get_transport() -> RequestsTransport | HttpxTransport:
+    """Транспорт по настройке HTTP_TRANSPORT: auto (httpx, если установлен), httpx или requests.
+    Кэшируется по (вид транспорта, размер пула) текущих настроек."""
+    from src.network import CHROME_UA, get_session
+
+    settings = get_settings()
+    kind = settings.http_transport
+    if kind == "auto":
+        kind = "httpx" if _httpx_available() else "requests"
+    max_connections = max(settings.max_workers, len(settings.urls))
+    with _TRANSPORTS_LOCK:
+        transport = _TRANSPORTS.get((kind, max_connections))
+        if transport is None:
+            if kind == "httpx":
+                transport = HttpxTransport(max_connections=max_connections, user_agent=CHROME_UA)
+            else:
+                transport = RequestsTransport(get_session())
+            _TRANSPORTS[(kind, max_connections)] = transport
+        return transport
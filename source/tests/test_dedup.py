@@ -0,0 +1,46 @@
+import random
+
+import pytest
+
+from src.dedup import DigestSet, config_digest, hostport_digest
+
+
+@pytest.mark.parametrize("digest_size", [8, 16])
+def test_digest_set_matches_builtin_set(digest_size):
+    rng = random.Random(digest_size)
+    pool = [rng.randbytes(digest_size) for _ in range(3000)]
+    # Повторы и рост таблицы с маленькой начальной ёмкостью
+    stream = [rng.choice(pool) for _ in range(10000)]
+    digests = DigestSet(digest_size=digest_size, capacity=4)
+    reference: set[bytes] = set()
+    for digest in stream:
+        assert digests.add(digest) == (digest not in reference)
+        reference.add(digest)
+    assert len(digests) == len(reference)
+    assert all(d in digests for d in reference)
+    assert not any(rng.randbytes(digest_size) in digests for _ in range(1000))
+
+
+def test_digest_set_ignores_trailing_bytes_beyond_digest_size():
+    digests = DigestSet(digest_size=8)
+    assert digests.add(b"\x02" * 8 + b"a" * 8)
+    assert b"\x02" * 8 + b"b" * 8 in digests
+
+
+def test_digest_set_zero_digest_is_storable():
+    digests = DigestSet(digest_size=16)
+    assert b"\x00" * 16 not in digests
+    assert digests.add(b"\x00" * 16)
+    assert b"\x00" * 16 in digests
+    assert not digests.add(b"\x00" * 16)
+
+
+def test_digest_set_rejects_unsupported_size():
+    with pytest.raises(ValueError):
+        DigestSet(digest_size=4)
+
+
+def test_hostport_digest_is_case_insensitive_for_host():
+    assert hostport_digest("Example.COM", "443") == hostport_digest("example.com", "443")
+    assert hostport_digest("example.com", "443") != hostport_digest("example.com", "8443")
+    assert config_digest("vless://a") != config_digest("vless://A")
@@ -0,0 +1,45 @@
+from src.ordering import order_configs, reorder_stable_file
+
+
+def _write(path, lines):
+    path.write_text("\n".join(lines), encoding="utf-8")
+
+
+def test_stable_keeps_previous_positions_and_appends_new(tmp_path):
+    previous = tmp_path / "prev.txt"
+    _write(previous, ["a", "b", "c", "d"])
+    assert order_configs(["d", "x", "b", "a", "y"], str(previous), "stable") == ["a", "b", "d", "x", "y"]
+
+
+def test_stable_preserves_duplicates_count(tmp_path):
+    previous = tmp_path / "prev.txt"
+    _write(previous, ["a", "a", "b"])
+    assert order_configs(["b", "a", "c", "a", "a"], str(previous), "stable") == ["a", "a", "b", "a", "c"]
+
+
+def test_stable_without_previous_file_keeps_upstream_order(tmp_path):
+    assert order_configs(["b", "a"], str(tmp_path / "missing.txt"), "stable") == ["b", "a"]
+
+
+def test_fingerprint_order_does_not_depend_on_input_order(tmp_path):
+    missing = str(tmp_path / "missing.txt")
+    lines = [f"vless://{n}" for n in range(50)]
+    assert order_configs(lines, missing, "fingerprint") == order_configs(lines[::-1], missing, "fingerprint")
+
+
+def test_reorder_stable_file_matches_order_configs(tmp_path):
+    previous, new, out = tmp_path / "prev.txt", tmp_path / "new.txt", tmp_path / "out.txt"
+    _write(previous, ["c", "gone", "a", "b"])
+    _write(new, ["a", "new1", "b", "c", "new2"])
+    reorder_stable_file(str(new), str(previous), str(out))
+    assert out.read_text(encoding="utf-8").split("\n") == ["c", "a", "b", "new1", "new2"]
+    assert out.read_text(encoding="utf-8").split("\n") == order_configs(
+        ["a", "new1", "b", "c", "new2"], str(previous), "stable"
+    )
+
+
+def test_reorder_stable_file_without_previous(tmp_path):
+    new, out = tmp_path / "new.txt", tmp_path / "out.txt"
+    _write(new, ["b", "a"])
+    reorder_stable_file(str(new), str(tmp_path / "missing.txt"), str(out))
+    assert out.read_text(encoding="utf-8") == "b\na"
@@ -0,0 +1,56 @@
+import base64
+import json
+
+import pytest
+
+from src.parser import validate_config
+
+UUID = "0b8e5f0a-1111-2222-3333-444455556666"
+
+
+def _b64(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("line", [
+    # SS-2022 и SIP002 со стандартным base64 в userinfo: «/» внутри ключа
+    "ss://2022-blake3-aes-256-gcm:ibY0IOHzUldKYA3QTX/TEz2YLOpaTslFJhS9C2yAlgY=@vip-nl-1.hkd4fwmg.vip:56884#🍥31@oneclickvpnkeys",
+    "ss://2022-blake3-chacha20-poly1305:EECkcZhvinEjpAAJXYZQXmyKQTXLoPaQEonv4Lmt/LY=@134.65.58.116:61312#🍥61@oneclickvpnkeys",
+    "ss://" + base64.b64encode(b"aes-256-gcm:p/w+d").decode() + "@1.2.3.4:8388/?plugin=obfs#name",
+    "ss://" + _b64("aes-128-gcm:secret@example.com:8388") + "#legacy",
+    f"vless://{UUID}@example.com:443?security=reality&sni=a.ru#name@tag",
+    "vless://my-custom-id@example.com:443",
+    f"vless://{UUID}@[2001:db8::1]:443/ws?path=%2F",
+    "trojan://pass@example.com:443?sni=x#a@b",
+    "tuic://uuid:pw@example.com:443",
+    "hysteria2://pw@example.com",
+    "hy2://pw@example.com:443/?sni=x",
+    "hy2://pw@example.com:20000-30000,443",
+    "vmess://" + _b64(json.dumps({"add": "example.com", "port": "443", "id": UUID})),
+    "brook://anything",
+    "unknown://whatever",
+])
+def test_valid_configs(line):
+    assert validate_config(line) is None
+
+
+@pytest.mark.parametrize("line, reason", [
+    ("not a config", "scheme"),
+    (f"vless://{UUID}@example.com:0", "port"),
+    (f"vless://{UUID}@example.com:70000", "port"),
+    (f"vless://{UUID}@example.com", "host/port"),
+    (f"vless://{UUID}@:443", "host/port"),
+    ("vless://@example.com:443", "uuid"),
+    ("vless://has space@example.com:443", "host/port"),
+    ("trojan://example.com:443", "credentials"),
+    ("ss://pw@:443", "host/port"),
+    ("ss://" + _b64("aes-128-gcm:secret@example.com"), "host/port"),
+    ("hy2://pw@example.com:300-200", "port"),
+    ("hy2://pw@example.com:0", "port"),
+    ("vmess://" + _b64(json.dumps({"add": "example.com", "port": 443})), "uuid"),
+    ("vmess://" + _b64(json.dumps({"add": "", "port": 443, "id": UUID})), "host/port"),
+    ("vmess://" + _b64(json.dumps({"add": "example.com", "port": 0, "id": UUID})), "port"),
+    ("vmess://" + _b64('{"add": "example.com", "po'), "vmess json"),
+])
+def test_invalid_configs(line, reason):
+    assert validate_config(line) == reason
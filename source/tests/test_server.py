@@ -0,0 +1,46 @@
+import pytest
+
+from src.server import _FILE_NAME_RE, _parse_range
+
+
+@pytest.mark.parametrize("header, size, expected", [
+    ("bytes=0-9", 100, (0, 9)),
+    ("bytes=10-", 100, (10, 99)),
+    ("bytes=90-200", 100, (90, 99)),
+    ("bytes=99-99", 100, (99, 99)),
+    (" bytes=0-0 ", 100, (0, 0)),
+    # Суффиксный диапазон: последние N байт, не больше размера
+    ("bytes=-10", 100, (90, 99)),
+    ("bytes=-500", 100, (0, 99)),
+])
+def test_parse_range_valid(header, size, expected):
+    assert _parse_range(header, size) == expected
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=100-", 100),
+    ("bytes=100-120", 100),
+    ("bytes=5-4", 100),
+    ("bytes=-0", 100),
+    ("bytes=-", 100),
+    ("bytes=0-", 0),
+    ("bytes=a-b", 100),
+    ("items=0-9", 100),
+    ("bytes=0-9,20-29", 100),
+])
+def test_parse_range_invalid(header, size):
+    assert _parse_range(header, size) is None
+
+
+@pytest.mark.parametrize("path, name", [
+    ("/1.txt", "1.txt"),
+    ("/githubmirror/26.txt", "26.txt"),
+    ("/1.txt.b64", "1.txt.b64"),
+    ("/githubmirror/1.txt.zst", "1.txt.zst"),
+    ("/1.txt.xz", None),
+    ("/../1.txt", None),
+    ("/sub/1.txt", None),
+])
+def test_file_name_re(path, name):
+    m = _FILE_NAME_RE.match(path)
+    assert (m.group(1) if m else None) == name
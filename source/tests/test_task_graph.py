@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from src.config import get_settings
+from src.context import RunContext
+from src.task_graph import TaskGraph
+
+
+def test_results_are_passed_to_dependents_in_order():
+    graph = TaskGraph()
+    graph.add("a", lambda: 2)
+    graph.add("b", lambda: 3)
+    graph.add("diff", lambda a, b: a - b, deps=("a", "b"))
+    graph.add("rev", lambda b, a: b - a, deps=("b", "a"))
+    results = graph.run(max_workers=4)
+    assert results == {"a": 2, "b": 3, "diff": -1, "rev": 1}
+
+
+def test_failure_skips_dependents_and_reraises_after_the_rest():
+    calls: list[str] = []
+    lock = threading.Lock()
+
+    def _task(name, fail=False):
+        def run(*_):
+            with lock:
+                calls.append(name)
+            if fail:
+                raise RuntimeError(name)
+            return name
+        return run
+
+    graph = TaskGraph()
+    graph.add("bad", _task("bad", fail=True))
+    graph.add("ok", _task("ok"))
+    graph.add("child", _task("child"), deps=("bad",))
+    graph.add("grandchild", _task("grandchild"), deps=("child", "ok"))
+    graph.add("independent", _task("independent"), deps=("ok",))
+
+    ctx = RunContext()
+    with ctx.activate(), pytest.raises(RuntimeError, match="bad"):
+        graph.run(max_workers=2)
+    assert sorted(calls) == ["bad", "independent", "ok"]
+    assert "❌ Задача bad завершилась с ошибкой: bad" in ctx.format_logs()
+
+
+def test_first_failure_is_reraised():
+    def _fail(error):
+        def run():
+            raise error
+        return run
+
+    # Один поток: задачи выполняются в порядке добавления
+    graph = TaskGraph()
+    graph.add("first", _fail(ValueError("first")))
+    graph.add("second", _fail(KeyError("second")))
+    with pytest.raises(ValueError, match="first"):
+        graph.run(max_workers=1)
+
+
+def test_add_rejects_duplicates_and_unknown_deps():
+    graph = TaskGraph()
+    graph.add("a", lambda: None)
+    with pytest.raises(ValueError):
+        graph.add("a", lambda: None)
+    with pytest.raises(ValueError):
+        graph.add("b", lambda _: None, deps=("missing",))
+
+
+def test_tasks_run_in_the_callers_run_context():
+    graph = TaskGraph()
+    graph.add("dir", lambda: get_settings().githubmirror_dir)
+    ctx = RunContext(output_dir="/tmp/graph-test")
+    with ctx.activate():
+        assert graph.run(max_workers=2)["dir"] == "/tmp/graph-test"
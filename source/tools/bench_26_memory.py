@@ -0,0 +1,79 @@
+"""Замер пиковой памяти при сборке 26.txt на синтетическом корпусе.
+
+Генерирует --sources файлов githubmirror/N.txt (по умолчанию 25) во временной папке
+с растущим числом строк и печатает пик tracemalloc для run_aggregates() — тех же задач
+шардов (временные файлы в cache_dir) и write_aggregate, что и в run_pipeline. Корпус
+целиком в память не читается, поэтому пик растёт только с числом уникальных конфигов:
+около 120 байт на конфиг (~24 МБ на 200 тыс.). Это таблицы дайджестов DigestSet:
+две в write_aggregate (полная строка и host:port) и две в reorder_stable_file, по
+21–42 байта на конфиг в каждой с учётом запаса ёмкости.
+
+    cd source && python tools/bench_26_memory.py --sizes 2000 10000 50000
+    cd source && python tools/bench_26_memory.py --sources 300 --sizes 2000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.config import configure, get_settings  # noqa: E402
+from src.context import RunContext  # noqa: E402
+from src.pipeline import run_aggregates  # noqa: E402
+
+
+def _write_corpus(mirror_dir: str, n_sources: int, lines_per_file: int, domains: list[str]):
+    for file_idx in range(1, n_sources + 1):
+        with open(os.path.join(mirror_dir, f"{file_idx}.txt"), "w", encoding="utf-8") as f:
+            for n in range(lines_per_file):
+                domain = domains[(file_idx * 7919 + n) % len(domains)]
+                f.write(
+                    f"vless://00000000-0000-4000-8000-{n:012d}@h{file_idx}-{n}.example.net:443"
+                    f"?security=reality&sni={domain}#src{file_idx}-{n}\n"
+                )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Пиковая память при сборке 26.txt")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 10000, 40000],
+                        help="Число строк в каждом файле источника")
+    parser.add_argument("--sources", type=int, default=25, help="Число источников")
+    args = parser.parse_args()
+
+    with open(get_settings().sni_domains_path, "r", encoding="utf-8") as f:
+        domains = json.load(f)
+
+    print(f"{'строк всего':>12} | {'пик, МБ':>8} | {'размер 26.txt, МБ':>18}")
+    with tempfile.TemporaryDirectory() as tmp:
+        sources_path = os.path.join(tmp, "sources.json")
+        with open(sources_path, "w", encoding="utf-8") as f:
+            json.dump([{"id": str(i), "url": f"https://example.net/{i}.txt"} for i in range(1, args.sources + 1)], f)
+        # Агрегат без дополнительных URL: замеряется только сборка из локальных файлов
+        outputs_path = os.path.join(tmp, "outputs.json")
+        with open(outputs_path, "w", encoding="utf-8") as f:
+            json.dump([{"id": "bench", "output": "aggregate.txt", "sources": "*", "sni_filter": True}], f)
+        mirror_dir = os.path.join(tmp, "githubmirror")
+        os.makedirs(mirror_dir)
+        configure(
+            githubmirror_dir=mirror_dir,
+            sources_path=sources_path,
+            outputs_path=outputs_path,
+            cache_dir=os.path.join(tmp, "cache"),
+        )
+
+        for size in args.sizes:
+            _write_corpus(mirror_dir, args.sources, size, domains)
+            tracemalloc.start()
+            run_aggregates(RunContext())
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            path_26 = os.path.join(mirror_dir, "aggregate.txt")
+            print(f"{size * args.sources:>12} | {peak / 1024 / 1024:>8.1f} | {os.path.getsize(path_26) / 1024 / 1024:>18.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Бенчмарк времени импорта генератора.
+
+Запускает `python -X importtime -c "import main"` несколько раз и падает
+(код выхода 1), если медианное время импорта превышает бюджет или если при
+старте подгружаются тяжёлые модули, которые должны импортироваться лениво.
+
+    cd source && python tools/check_import_time.py --budget-ms 80
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+SOURCE_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Модули, которые не должны загружаться при импорте main/src.*
+FORBIDDEN_AT_IMPORT = (
+    "requests",
+    "urllib3",
+    "github",
+    "charset_normalizer",
+    "idna",
+    "httpx",
+    "h2",
+    "zstandard",
+    "brotli",
+)
+
+
+def _measure_once(target: str) -> tuple[float, set[str]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=SOURCE_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {target} завершился с ошибкой:\n{proc.stderr[-2000:]}")
+
+    total_us = 0
+    modules: set[str] = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        try:
+            _, cumulative, name = line.split("|", 2)
+            cumulative_us = int(cumulative.strip())
+        except ValueError:
+            continue  # строка заголовка
+        module = name.strip()
+        modules.add(module)
+        if module == target:
+            total_us = cumulative_us
+    return total_us / 1000, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Проверка времени импорта генератора")
+    parser.add_argument("--target", default="main", help="Импортируемый модуль")
+    parser.add_argument("--runs", type=int, default=7, help="Число замеров")
+    parser.add_argument("--budget-ms", type=float, default=80.0, help="Допустимая медиана, мс")
+    args = parser.parse_args()
+
+    timings: list[float] = []
+    loaded: set[str] = set()
+    for _ in range(max(1, args.runs)):
+        ms, modules = _measure_once(args.target)
+        timings.append(ms)
+        loaded |= modules
+
+    median_ms = statistics.median(timings)
+    print(f"import {args.target}: медиана {median_ms:.1f} мс, мин {min(timings):.1f} мс (бюджет {args.budget_ms:.0f} мс)")
+
+    failed = False
+    heavy = sorted(m for m in loaded if m.split(".")[0] in FORBIDDEN_AT_IMPORT)
+    if heavy:
+        print(f"❌ При импорте загружены тяжёлые модули: {', '.join(heavy)}")
+        failed = True
+    if median_ms > args.budget_ms:
+        print(f"❌ Время импорта превышает бюджет на {median_ms - args.budget_ms:.1f} мс")
+        failed = True
+    if not failed:
+        print("✅ Время импорта в пределах бюджета")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())